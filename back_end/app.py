@@ -1,6 +1,11 @@
 
 
-from back_end.utils.db import engine, Base
+from back_end.utils.db import engine, Base, init_app
+from back_end.utils import metrics
+from back_end.utils.logger import get_logger
+from back_end.utils.migrations import run_migrations
+from back_end.config.config import PRELOAD_SALES_MODEL
+from back_end.ml.model_loader import sales_model_registry
 from flask import Flask
 from flask_cors import CORS
 
@@ -9,10 +14,16 @@ from back_end.routes.shift_pre_routes import shift_pre_bp
 from back_end.routes.daily_report_route import daily_report_bp
 from back_end.routes.prediction_routes import pred_sales_bp
 from back_end.routes.shift_routes import shift_ass_bp
+from back_end.routes.metrics_routes import metrics_bp
 
 def create_app():
     application = Flask(__name__)
-    CORS(application)
+    # ページングのヘッダーをブラウザのクライアントにも見せる
+    CORS(application, expose_headers=["X-Next-Cursor", "Link", "ETag"])
+    # リクエストごとのDBセッションを終了時に閉じる
+    init_app(application)
+    # エンドポイント別の処理時間 (/metrics)
+    metrics.init_app(application)
 
     # 各 Blueprint の登録
     application.register_blueprint(staff_bp)
@@ -20,9 +31,12 @@ def create_app():
     application.register_blueprint(daily_report_bp)
     application.register_blueprint(pred_sales_bp)
     application.register_blueprint(shift_ass_bp)
+    application.register_blueprint(metrics_bp)
 
     return application
 
+logger = get_logger(__name__)
+
 # アプリのインスタンスを作成
 app = create_app()
 
@@ -33,9 +47,17 @@ with app.app_context():
         from . import models 
 
         Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully!")
+        run_migrations(engine)
+        logger.info("Database tables created successfully!")
+    except Exception as e:
+        logger.error("Database table creation failed: %s", e)
+
+if PRELOAD_SALES_MODEL:
+    try:
+        sales_model_registry.preload()
+        logger.info("Sales model loaded (version %s)", sales_model_registry.version)
     except Exception as e:
-        print(f"Database table creation failed: {e}")
+        logger.error("Sales model preload failed: %s", e)
 
 if __name__ == "__main__":
     # local
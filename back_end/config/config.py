@@ -0,0 +1,120 @@
+import os
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ---------------------------------------------------------
+# Database pool
+# ---------------------------------------------------------
+# connections kept open per process, and extra ones allowed under bursts
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+# reconnect before the server side drops idle connections
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+# seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+
+
+# ---------------------------------------------------------
+# Logging / metrics
+# ---------------------------------------------------------
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# SQLAlchemy statement logging (very slow on the hot path; debug only)
+DB_ECHO = _env_bool("DB_ECHO", False)
+# upper bounds (seconds) of the /metrics latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# requests slower than this are logged with their per-stage times
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", 2.0))
+
+
+# ---------------------------------------------------------
+# List endpoints (keyset pagination)
+# ---------------------------------------------------------
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 1000))
+
+
+# ---------------------------------------------------------
+# Staff directory cache
+# ---------------------------------------------------------
+# how often a worker checks whether another worker changed the staff table
+STAFF_CACHE_CHECK_SECONDS = float(os.environ.get("STAFF_CACHE_CHECK_SECONDS", 2.0))
+
+
+# ---------------------------------------------------------
+# ML model
+# ---------------------------------------------------------
+# load the sales model when the app module is imported, so that
+# `gunicorn --preload` deserializes it once in the master process
+PRELOAD_SALES_MODEL = _env_bool("PRELOAD_SALES_MODEL", True)
+
+
+# ---------------------------------------------------------
+# Prediction cache (/pred_sales_dash)
+# ---------------------------------------------------------
+# stored predictions younger than this are served as-is; older ones are
+# returned immediately and recomputed in the background
+PRED_CACHE_TTL_SECONDS = int(os.environ.get("PRED_CACHE_TTL_SECONDS", 6 * 3600))
+
+
+# ---------------------------------------------------------
+# Store
+# ---------------------------------------------------------
+# used when a request does not name a store (single-shop deployments)
+DEFAULT_STORE_ID = int(os.environ.get("DEFAULT_STORE_ID", 1))
+DEFAULT_LATITUDE = float(os.environ.get("DEFAULT_LATITUDE", 35.6895))
+DEFAULT_LONGITUDE = float(os.environ.get("DEFAULT_LONGITUDE", 139.6917))
+
+
+# ---------------------------------------------------------
+# Shift optimization (CP-SAT)
+# ---------------------------------------------------------
+# time limit by problem size: (max number of variables, seconds)
+SOLVER_TIME_TIERS = [
+    (2000, float(os.environ.get("SOLVER_TIME_SMALL", 5))),
+    (20000, float(os.environ.get("SOLVER_TIME_MEDIUM", 10))),
+    (None, float(os.environ.get("SOLVER_TIME_LARGE", 30))),
+]
+SOLVER_NUM_WORKERS = int(os.environ.get("SOLVER_NUM_WORKERS", min(os.cpu_count() or 1, 8)))
+SOLVER_RELATIVE_GAP = float(os.environ.get("SOLVER_RELATIVE_GAP", 0.0))
+SOLVER_RANDOM_SEED = int(os.environ.get("SOLVER_RANDOM_SEED", 0))
+# how many weeks back to look for a same-weekday schedule to warm start from
+SOLVER_HINT_LOOKBACK_WEEKS = int(os.environ.get("SOLVER_HINT_LOOKBACK_WEEKS", 4))
+# order interchangeable staff (same hours / seniority / cap) so permutations are cut
+SOLVER_SYMMETRY_BREAKING = os.environ.get("SOLVER_SYMMETRY_BREAKING", "1") not in ("0", "false", "False")
+
+# "full" | "decomposed" | "auto" (decomposed from SHIFT_DECOMPOSE_MIN_DAYS days)
+SHIFT_SOLVE_MODE = os.environ.get("SHIFT_SOLVE_MODE", "auto")
+SHIFT_DECOMPOSE_MIN_DAYS = int(os.environ.get("SHIFT_DECOMPOSE_MIN_DAYS", 14))
+# processes solving days at the same time in decomposed mode
+SHIFT_DECOMPOSE_WORKERS = int(os.environ.get("SHIFT_DECOMPOSE_WORKERS", os.cpu_count() or 1))
+
+
+# ---------------------------------------------------------
+# Shift jobs (POST /shift_ass_jobs)
+# ---------------------------------------------------------
+# solver processes per web worker; they never run inside the web worker
+SHIFT_JOB_WORKERS = int(os.environ.get("SHIFT_JOB_WORKERS", 2))
+# "spawn" avoids forking a process that holds DB connections and threads
+SHIFT_JOB_START_METHOD = os.environ.get("SHIFT_JOB_START_METHOD", "spawn")
+# decomposed-mode processes inside one job worker (jobs share the CPUs)
+SHIFT_JOB_DECOMPOSE_WORKERS = int(os.environ.get(
+    "SHIFT_JOB_DECOMPOSE_WORKERS", max(1, (os.cpu_count() or 1) // SHIFT_JOB_WORKERS)
+))
+
+
+# ---------------------------------------------------------
+# Sales model retraining (POST /model/retrain)
+# ---------------------------------------------------------
+# training processes; niced so prediction requests keep the CPU
+RETRAIN_WORKERS = int(os.environ.get("RETRAIN_WORKERS", 2))
+RETRAIN_NICE = int(os.environ.get("RETRAIN_NICE", 10))
+# most recent share of days kept out of training to compare old and new model
+RETRAIN_HOLDOUT_FRACTION = float(os.environ.get("RETRAIN_HOLDOUT_FRACTION", 0.2))
+RETRAIN_CV_SPLITS = int(os.environ.get("RETRAIN_CV_SPLITS", 3))
+RETRAIN_MIN_ROWS = int(os.environ.get("RETRAIN_MIN_ROWS", 60))
@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .model_loader import DATA_DIR
+
+
+FESTIVAL_PATH = os.path.join(DATA_DIR, "festival_date.json")
+
+WEEKDAY_NAMES = np.array(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+)
+# index = month (1..12)
+SEASON_BY_MONTH = np.array(
+    ["", "winter", "winter", "spring", "spring", "spring", "summer",
+     "summer", "summer", "autumn", "autumn", "autumn", "winter"]
+)
+
+
+class CalendarFeatures:
+    """Vectorized calendar feature table (festival, weekday, month, day, season).
+
+    The festival list is parsed once and cached together with the file's
+    mtime; built tables are memoized per date range and dropped whenever
+    the festival file changes.
+    """
+
+    def __init__(self, festival_path=FESTIVAL_PATH, max_cached_ranges=32):
+        self.festival_path = festival_path
+        self.max_cached_ranges = max_cached_ranges
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._festival_codes = None     # np.ndarray of month * 100 + day
+        self._tables = {}
+
+    @staticmethod
+    def parse_festival_dates(entries):
+        """["4-20", "12,31", ...] -> array of month * 100 + day."""
+        codes = []
+        for entry in entries:
+            month, day = (int(p) for p in re.split(r"[-,/]", str(entry).strip())[:2])
+            codes.append(month * 100 + day)
+        return np.unique(np.array(codes, dtype=np.int32))
+
+    def festival_codes(self):
+        try:
+            mtime = os.stat(self.festival_path).st_mtime_ns
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"{self.festival_path} not found") from e
+
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.festival_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                # {"date": ["4-20", "5-9", ...]}
+                self._festival_codes = self.parse_festival_dates(data["date"])
+                self._mtime = mtime
+                self._tables.clear()
+            return self._festival_codes
+
+    def build(self, start, end):
+        """Feature table with one row per day in [start, end]."""
+        codes = self.festival_codes()
+        key = (pd.Timestamp(start), pd.Timestamp(end))
+        table = self._tables.get(key)
+        if table is not None:
+            return table.copy()
+
+        dates = pd.date_range(start=key[0], end=key[1])
+        month = dates.month.to_numpy()
+        day = dates.day.to_numpy()
+
+        table = pd.DataFrame({
+            "date": dates,
+            "festival": np.isin(month * 100 + day, codes).astype(np.int64),
+            "weekday": WEEKDAY_NAMES[dates.dayofweek.to_numpy()],
+            "month": month,
+            "day": day,
+            "season": SEASON_BY_MONTH[month],
+        })
+
+        with self._lock:
+            if len(self._tables) >= self.max_cached_ranges:
+                self._tables.pop(next(iter(self._tables)))
+            self._tables[key] = table
+        return table.copy()
+
+
+calendar_features = CalendarFeatures()
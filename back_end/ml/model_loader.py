@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+
+import joblib
+
+
+DATA_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data")
+)
+SALES_MODEL_PATH = os.path.join(DATA_DIR, "xgb_sales_model.joblib")
+
+
+class ModelRegistry:
+    """Process-wide cache for a joblib model artifact.
+
+    The model is deserialized once per process and reused by every request.
+    Each ``get()`` stats the artifact; when its mtime/size changes the file is
+    hashed and reloaded, and the (model, version) pair is swapped in one
+    assignment so concurrent readers never see a half-loaded model.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # (model, version, (mtime_ns, size)) - replaced as a whole on reload
+        self._entry = None
+
+    @staticmethod
+    def _file_hash(path):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()[:12]
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Sales model not found at {self.path}") from e
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Return ``(model, version)``, reloading only if the artifact changed."""
+        stamp = self._stat()
+        entry = self._entry
+        if entry is not None and entry[2] == stamp:
+            return entry[0], entry[1]
+
+        with self._lock:
+            # another thread may have reloaded while we were waiting
+            entry = self._entry
+            if entry is not None and entry[2] == stamp:
+                return entry[0], entry[1]
+
+            version = self._file_hash(self.path)
+            if entry is not None and entry[1] == version:
+                # touched but identical content: keep the loaded booster
+                self._entry = (entry[0], version, stamp)
+                return entry[0], version
+
+            model = joblib.load(self.path)
+            self._entry = (model, version, stamp)
+            return model, version
+
+    @property
+    def version(self):
+        return self.get()[1]
+
+    def preload(self):
+        """Load eagerly (e.g. at import time under ``gunicorn --preload``)."""
+        self.get()
+        return self
+
+
+sales_model_registry = ModelRegistry(SALES_MODEL_PATH)
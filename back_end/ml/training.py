@@ -0,0 +1,321 @@
+"""Retrain the sales model from ``daily_data`` actuals off the request path.
+
+    python -m back_end.ml.training            # one run, in the foreground
+
+A run loads the actuals plus stored weather, keeps the most recent
+RETRAIN_HOLDOUT_FRACTION of days as a holdout, scores a small
+hyperparameter grid with time-series cross-validation, fits the best
+candidate on the rest and compares it with the serving model on the
+holdout. Only when its holdout MAE is lower are the same parameters
+refit on every row, so the promoted model also learns the latest days;
+that final fit itself is not scored, and because it has already seen
+the recent days the next run's holdout flatters it until enough new
+reports arrive. The artifact is kept under
+``models/`` and replaces ``xgb_sales_model.joblib`` (``os.replace``, so
+readers never see a partial file); ``ModelRegistry`` notices the new
+file on its next ``get()`` in every worker. If the serving model exists
+but cannot be scored the run fails rather than promote blindly.
+
+All heavy work runs in a niced process pool; the web process only keeps
+a thread that waits on the futures.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .model_loader import DATA_DIR, SALES_MODEL_PATH
+from ..config.config import (
+    RETRAIN_WORKERS, RETRAIN_NICE, RETRAIN_HOLDOUT_FRACTION, RETRAIN_MIN_ROWS,
+    RETRAIN_CV_SPLITS, SHIFT_JOB_START_METHOD, DEFAULT_LATITUDE, DEFAULT_LONGITUDE,
+)
+from ..utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+ARTIFACT_DIR = os.path.join(DATA_DIR, "models")
+
+# same columns as DataPrepare.FEATURES; festival is 0/1 so it stays numeric
+NUM_COLS = ["month", "day", "temperature", "rain", "festival"]
+CAT_COLS = ["weekday", "weather", "season"]
+
+PARAM_GRID = {
+    "n_estimators": [200, 400],
+    "max_depth": [3, 4, 6],
+    "learning_rate": [0.05, 0.1],
+}
+FIXED_PARAMS = {"subsample": 0.7, "colsample_bytree": 0.9, "random_state": 42, "n_jobs": 1}
+
+RUNNING = "running"
+PROMOTED = "promoted"
+REJECTED = "rejected"
+FAILED = "failed"
+
+
+# =========================================================
+# DATA / MODEL
+# =========================================================
+def load_training_frame(latitude=DEFAULT_LATITUDE, longitude=DEFAULT_LONGITUDE):
+    """(X, y) from daily_data joined with calendar and stored weather, in date order."""
+    from ..models.daily_report_model import Daily_data
+    from ..services.pred_manager import DataPrepare
+    from ..services.weather_store import WeatherStore
+    from ..utils.db import get_db, remove_session
+    from .calendar_features import calendar_features
+
+    try:
+        db = next(get_db())
+        rows = db.query(Daily_data.date, Daily_data.sales).order_by(Daily_data.date).all()
+        actuals = pd.DataFrame(rows, columns=["date", "sales"])
+        if actuals.empty:
+            return pd.DataFrame(columns=DataPrepare.FEATURES), pd.Series(dtype=float)
+        # 同じ日に複数の日報があれば合計
+        actuals["date"] = pd.to_datetime(actuals["date"]).dt.date
+        actuals = actuals.groupby("date", as_index=False)["sales"].sum()
+
+        start, end = actuals["date"].min(), actuals["date"].max()
+        calendar_df = calendar_features.build(start, end)
+        # 過去の天気は保存済みの分だけ使う (欠損はパイプラインで補完)
+        weather_df = DataPrepare.weather_frame(
+            WeatherStore(latitude, longitude).stored_range(start, end)
+        )
+        prepare = DataPrepare(start.isoformat(), end.isoformat())
+        features = prepare.feature_frame(calendar_df, weather_df)
+        df = features.merge(actuals, on="date", how="inner").sort_values("date")
+        X = df[DataPrepare.FEATURES].reset_index(drop=True)
+        # 天気が無い日は None のままだと object 型になる
+        X[NUM_COLS] = X[NUM_COLS].astype(float)
+        return X, df["sales"].astype(float).reset_index(drop=True)
+    finally:
+        remove_session()
+
+
+def make_pipeline(params):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from xgboost import XGBRegressor
+
+    preprocessor = ColumnTransformer([
+        ("num", Pipeline([
+            ("impute", SimpleImputer(strategy="median")),
+            ("scale", StandardScaler()),
+        ]), NUM_COLS),
+        ("cat", Pipeline([
+            ("impute", SimpleImputer(strategy="constant", fill_value="missing")),
+            ("onehot", OneHotEncoder(handle_unknown="ignore")),
+        ]), CAT_COLS),
+    ])
+    return Pipeline([
+        ("preprocessor", preprocessor),
+        ("model", XGBRegressor(**FIXED_PARAMS, **params)),
+    ])
+
+
+def _mae(y_true, y_pred):
+    return float(np.mean(np.abs(np.asarray(y_true) - np.asarray(y_pred))))
+
+
+def parameter_grid():
+    keys = sorted(PARAM_GRID)
+    return [dict(zip(keys, values)) for values in itertools.product(*(PARAM_GRID[k] for k in keys))]
+
+
+# =========================================================
+# WORKER TASKS
+# =========================================================
+def _init_worker():
+    # 学習は配信より後回し (CPU の優先度を下げる)
+    try:
+        os.nice(RETRAIN_NICE)
+    except (AttributeError, OSError):
+        pass
+    from ..utils.db import engine
+    engine.dispose(close=False)
+
+
+def cv_score(X, y, params, n_splits=RETRAIN_CV_SPLITS):
+    """Mean MAE over expanding-window time-series folds."""
+    from sklearn.model_selection import TimeSeriesSplit
+
+    scores = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        pipeline = make_pipeline(params)
+        pipeline.fit(X.iloc[train_idx], y.iloc[train_idx])
+        scores.append(_mae(y.iloc[test_idx], pipeline.predict(X.iloc[test_idx])))
+    return float(np.mean(scores))
+
+
+def evaluate(X_train, y_train, X_hold, y_hold, params):
+    """(candidate holdout MAE, serving model holdout MAE or None if there is none).
+
+    Raises when the serving model exists but cannot be loaded or scored.
+    """
+    pipeline = make_pipeline(params)
+    pipeline.fit(X_train, y_train)
+    new_mae = _mae(y_hold, pipeline.predict(X_hold))
+
+    # 配信中のモデルが無い時だけ比較なしで置き換える
+    if not os.path.exists(SALES_MODEL_PATH):
+        return new_mae, None
+    try:
+        current = joblib.load(SALES_MODEL_PATH)
+        return new_mae, _mae(y_hold, current.predict(X_hold))
+    except Exception as e:
+        raise RuntimeError(f"serving model could not be scored: {e}") from e
+
+
+def fit_final(X, y, params, artifact_path):
+    """Refit `params` on every row (holdout included) and save the artifact."""
+    pipeline = make_pipeline(params)
+    pipeline.fit(X, y)
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    joblib.dump(pipeline, artifact_path)
+
+
+def promote(artifact_path, target=SALES_MODEL_PATH):
+    """Atomically make `artifact_path` the serving model."""
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    with open(artifact_path, "rb") as src, open(tmp, "wb") as dst:
+        for chunk in iter(lambda: src.read(1 << 20), b""):
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp, target)
+
+
+# =========================================================
+# RUNS
+# =========================================================
+def _run_path(run_id):
+    return os.path.join(ARTIFACT_DIR, f"{run_id}.json")
+
+
+def _write_run(record):
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = _run_path(record["run_id"])
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def read_run(run_id):
+    if not run_id.replace("-", "").isalnum():
+        return None
+    try:
+        with open(_run_path(run_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class Retrainer:
+    """Runs one retraining at a time per process on a niced process pool."""
+
+    _executor = None
+    _lock = threading.Lock()
+    _running = None
+
+    @classmethod
+    def executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=RETRAIN_WORKERS,
+                    mp_context=multiprocessing.get_context(SHIFT_JOB_START_METHOD),
+                    initializer=_init_worker,
+                )
+            return cls._executor
+
+    @classmethod
+    def start(cls):
+        """Start a run in a background thread; returns its record (or the running one)."""
+        with cls._lock:
+            if cls._running is not None:
+                return read_run(cls._running)
+            run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+            cls._running = run_id
+
+        record = {"run_id": run_id, "status": RUNNING,
+                  "started_at": datetime.now().isoformat(timespec="seconds")}
+        _write_run(record)
+        threading.Thread(target=cls._run, args=(record,), daemon=True).start()
+        return record
+
+    @classmethod
+    def _run(cls, record):
+        try:
+            cls.run(record)
+        finally:
+            with cls._lock:
+                cls._running = None
+
+    @classmethod
+    def run(cls, record=None):
+        """Whole pipeline; every heavy step is a task on the process pool."""
+        if record is None:
+            record = {"run_id": datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6],
+                      "status": RUNNING,
+                      "started_at": datetime.now().isoformat(timespec="seconds")}
+            _write_run(record)
+        pool = cls.executor()
+        try:
+            X, y = pool.submit(load_training_frame).result()
+            record["rows"] = len(X)
+            if len(X) < RETRAIN_MIN_ROWS:
+                raise ValueError(f"need at least {RETRAIN_MIN_ROWS} days of reports, have {len(X)}")
+
+            # 直近の期間をホールドアウト (時系列なのでシャッフルしない)
+            n_hold = max(1, int(len(X) * RETRAIN_HOLDOUT_FRACTION))
+            X_train, y_train = X.iloc[:-n_hold], y.iloc[:-n_hold]
+            X_hold, y_hold = X.iloc[-n_hold:], y.iloc[-n_hold:]
+
+            grid = parameter_grid()
+            futures = [pool.submit(cv_score, X_train, y_train, params) for params in grid]
+            scores = [f.result() for f in futures]
+            best = int(np.argmin(scores))
+            record["best_params"] = grid[best]
+            record["cv_mae"] = round(scores[best], 2)
+
+            new_mae, current_mae = pool.submit(
+                evaluate, X_train, y_train, X_hold, y_hold, grid[best]
+            ).result()
+            record.update({
+                "holdout_days": n_hold,
+                "holdout_mae": round(new_mae, 2),
+                "serving_mae": None if current_mae is None else round(current_mae, 2),
+            })
+
+            if current_mae is None or new_mae < current_mae:
+                # 比較に勝ったら直近のホールドアウトも含めて学習し直す
+                artifact = os.path.join(ARTIFACT_DIR, f"xgb_sales_model-{record['run_id']}.joblib")
+                pool.submit(fit_final, X, y, grid[best], artifact).result()
+                record["artifact"] = os.path.basename(artifact)
+                promote(artifact)
+                record["status"] = PROMOTED
+            else:
+                record["status"] = REJECTED
+            logger.info("retrain %s: %s (holdout MAE %.1f vs %s)", record["run_id"],
+                        record["status"], new_mae, current_mae)
+        except Exception as e:
+            logger.exception("retrain %s failed", record["run_id"])
+            record["status"] = FAILED
+            record["error"] = str(e)
+        record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        _write_run(record)
+        return record
+
+
+if __name__ == "__main__":
+    print(json.dumps(Retrainer.run(), ensure_ascii=False, indent=2))
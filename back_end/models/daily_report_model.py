@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Boolean, JSON, Date
 from ..utils.db import Base,engine
 
 
@@ -7,7 +7,7 @@ class Daily_data(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    date = Column(String, nullable=False)          # "2025-08-10"
+    date = Column(Date, nullable=False, index=True)    # 2025-08-10
     day = Column(String, nullable=False)           # "Monday"
 
     is_event = Column(Boolean, default=False)      # イベント有無
@@ -21,7 +21,7 @@ class Daily_data(Base):
     def to_dict(self):
         return {
             "id": self.id,
-            "date": self.date,
+            "date": self.date.isoformat(),
             "day": self.day,
             "is_event": self.is_event,
             "customer_count": self.customer_count,
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime
+from ..utils.db import Base
+
+
+class DailyRollup(Base):
+    __tablename__ = "daily_report_rollups"
+
+    # 日報の集計 (日報の登録と同じトランザクションで加算)
+    # grain: day / week (ISO 週, 月曜始まり) / month / weekday (月 x 曜日)
+    grain = Column(String(10), primary_key=True)
+    period_start = Column(Date, primary_key=True)   # 日 / 週の月曜 / 月の1日
+    weekday = Column(Integer, primary_key=True)     # weekday のみ 0=月曜, 他は -1
+
+    report_count = Column(Integer, nullable=False, default=0)
+    event_days = Column(Integer, nullable=False, default=0)
+    sales_sum = Column(BigInteger, nullable=False, default=0)
+    customer_sum = Column(BigInteger, nullable=False, default=0)
+    staff_count_sum = Column(BigInteger, nullable=False, default=0)   # 延べ人数
+
+    updated_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "grain": self.grain,
+            "period_start": self.period_start.isoformat(),
+            "weekday": self.weekday,
+            "report_count": self.report_count,
+            "event_days": self.event_days,
+            "sales_sum": self.sales_sum,
+            "customer_sum": self.customer_sum,
+            "staff_count_sum": self.staff_count_sum,
+        }
@@ -1,16 +1,29 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON,Date,Float
+from sqlalchemy import Column, Integer, String, Boolean, JSON,Date,Float,DateTime,Index
 from ..utils.db import Base,engine
+from ..config.config import DEFAULT_STORE_ID
 
 class Pred_sales(Base):
     __tablename__ = "prediction_sales"
     
     id = Column(Integer , primary_key=True, index=True)
+    store_id = Column(Integer , nullable=False, default=DEFAULT_STORE_ID)
     date = Column(Date , nullable=False)
     pred_sales = Column(Float , nullable=False)
+
+    # どのモデルで予測したか / いつ更新したか
+    model_version = Column(String(32), nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # 1店舗1日1行 (bulk upsert の ON CONFLICT 対象)
+        Index("uq_pred_sales_store_date", "store_id", "date", unique=True),
+    )
     
     def to_dict(self):
         return{
             "id" : self.id,
+            "store_id" : self.store_id,
             "date" : self.date,
-            "pred_sales" : self.pred_sales
-        }
\ No newline at end of file
+            "pred_sales" : self.pred_sales,
+            "model_version" : self.model_version
+        }
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from ..utils.db import Base
+
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    # 書き込みのたびに +1 (ETag の元、1リソース = 1行)
+    name = Column(String(50), primary_key=True)     # shifts / staff / shift_pre / daily_report
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
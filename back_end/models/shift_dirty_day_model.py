@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Date, DateTime
+from ..utils.db import Base
+
+
+class ShiftDirtyDay(Base):
+    __tablename__ = "shift_dirty_days"
+
+    # 希望シフト / スタッフ変更で作り直しが必要な日 (1日 = 1行)
+    date = Column(Date, primary_key=True)
+    reason = Column(String(50), nullable=False)     # shift_pre / staff_update / staff_delete
+    marked_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "date": self.date.isoformat(),
+            "reason": self.reason,
+            "marked_at": self.marked_at.isoformat(),
+        }
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, Text
+from ..utils.db import Base
+
+
+class ShiftJob(Base):
+    __tablename__ = "shift_jobs"
+
+    # シフト自動作成ジョブ 1件 = 1行 (プロセスプールで実行)
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False)     # queued / running / done / failed / cancelled
+
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    store_id = Column(Integer, nullable=True)
+    options = Column(JSON, nullable=True)           # solver options
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "store_id": self.store_id,
+            "options": self.options,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -1,40 +1,35 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, Date, ForeignKey, CheckConstraint, Index
+from sqlalchemy.orm import relationship
 from ..utils.db import Base
 
 class ShiftMain(Base):
-    __tablename__ = "shift_ass"
+    __tablename__ = "shift_blocks"
 
-    # シフト割当1件 = 1行
+    # 連続した勤務1ブロック = 1行 ([start_hour, end_hour) の時間帯)
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     # 時間情報
     date = Column(Date, nullable=False)
-    hour = Column(Integer, nullable=False)
+    start_hour = Column(Integer, nullable=False)
+    end_hour = Column(Integer, nullable=False)
 
-    # スタッフ情報
-    staff_id = Column(Integer, nullable=False)
-    name = Column(String(50), nullable=False)
-    level = Column(Integer, nullable=True)
-    status = Column(String(50), nullable=False)  # student / normal / etc
+    # スタッフ (名前・レベル等は staff から引く)
+    # null = 人手不足の枠 (不足1人につき1ブロック)
+    staff_id = Column(Integer, ForeignKey("staff.id", ondelete="CASCADE"), nullable=True)
 
-    # コスト情報
-    salary = Column(Integer, nullable=False)
-
-    # 予測・最適化結果
-    
-    # null = perfect（追加不要）
-    # 数値 = あと何人入れられるか
+    staff = relationship("Staff")
+    __table_args__ = (
+        CheckConstraint("start_hour < end_hour", name="ck_block_start_before_end"),
+        # 期間での読み出し / スタッフごとの担当日
+        Index("ix_shift_blocks_date_start", "date", "start_hour"),
+        Index("ix_shift_blocks_staff_date", "staff_id", "date"),
+    )
 
     def to_dict(self):
         return {
             "id": self.id,
             "date": self.date.isoformat(),
-            "hour": self.hour,
             "staff_id": self.staff_id,
-            "name": self.name,
-            "level": self.level,
-            "status": self.status,
-            "salary": self.salary,
-      
-            
+            "start_hour": self.start_hour,
+            "end_hour": self.end_hour,
         }
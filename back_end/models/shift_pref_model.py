@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Date, CheckConstraint, Time
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Date, CheckConstraint, Time, Index
 from sqlalchemy.orm import relationship
 from datetime import time
 from ..utils.db import Base
 
+# Time 型は 24:00 を持てないので、閉店 (24:00) までの希望はこの時刻で保存
+CLOSING_TIME = time(23, 59, 59)
+
 class ShiftPre(Base):
     __tablename__ = "shift_pre"
 
@@ -19,14 +22,21 @@ class ShiftPre(Base):
     __table_args__ = (
         UniqueConstraint("staff_id", "date", name="uq_staff_date"),
         CheckConstraint("start_time < end_time", name="ck_start_before_end"),
-        
+        # (staff_id, date) は uq_staff_date が兼ねる。期間検索用に date 単独も
+        Index("ix_shift_pre_date", "date"),
     )
 
+    @staticmethod
+    def format_end(end_time):
+        if end_time is None:
+            return None
+        return "24:00" if end_time == CLOSING_TIME else end_time.strftime("%H:%M")
+
     def to_dict(self):
         return {
             "shift_id": self.shift_id,
             "staff_id": self.staff_id,
             "date": self.date.isoformat(),
             "start_time": self.start_time.strftime("%H:%M") if self.start_time else None,
-            "end_time": self.end_time.strftime("%H:%M") if self.end_time else None,
+            "end_time": self.format_end(self.end_time),
         }
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime
+from ..utils.db import Base
+
+
+class WeatherDaily(Base):
+    __tablename__ = "weather_daily"
+
+    # 1行 = 1地点 x 1日 (Open-Meteo daily)
+    latitude = Column(Float, primary_key=True)
+    longitude = Column(Float, primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    rain = Column(Float, nullable=True)
+    snowfall = Column(Float, nullable=True)
+    weather_code = Column(Integer, nullable=True)
+    temperature = Column(Float, nullable=True)
+
+    # rows fetched before `date` has passed are forecasts and get refreshed
+    fetched_at = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "date": self.date.isoformat(),
+            "rain": self.rain,
+            "snowfall": self.snowfall,
+            "weather_code": self.weather_code,
+            "temperature": self.temperature,
+            "fetched_at": self.fetched_at.isoformat(),
+        }
@@ -1,19 +1,55 @@
 from flask import Blueprint, request, jsonify
 from ..services.daily_report_manager import DailyReport
+from ..utils.pagination import page_args, page_response
+from ..utils.validators import parse_date
+from ..services.resource_versions import DAILY_REPORT
+from .conditional import conditional_get
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 daily_report_bp = Blueprint("daily_report", __name__)
 
 @daily_report_bp.post("/daily_report")
 def create_new_daily():
     data = request.get_json()
-    print(data)
+    logger.debug("daily report: %s", data)
     if not data:
         return jsonify({"error": "invalid json"}), 400
-    new_d = DailyReport.create_daily_report(data)
+    try:
+        new_d = DailyReport.create_daily_report(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(new_d.to_dict()), 201
     
 @daily_report_bp.get("/daily_report")
+@conditional_get(DAILY_REPORT)
 def get_dr_data():
-    dr = DailyReport.get_daily_report()
-    return jsonify([d.to_dict() for d in dr]), 200
+    # ?start_date=&end_date=&limit=&cursor= (新しい日付から)
+    try:
+        limit, cursor = page_args()
+        dr, next_cursor = DailyReport.get_daily_report(
+            start=parse_date(request.args.get("start_date"), "start_date"),
+            end=parse_date(request.args.get("end_date"), "end_date"),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return page_response([d.to_dict() for d in dr], next_cursor)
+
+
+@daily_report_bp.get("/daily_report/rollups")
+@conditional_get(DAILY_REPORT)
+def get_dr_rollups():
+    # ?grain=day|week|month|weekday&start_date=&end_date= (期間の開始日で絞り込み)
+    try:
+        rows = DailyReport.get_rollups(
+            request.args.get("grain", "day"),
+            start=parse_date(request.args.get("start_date"), "start_date"),
+            end=parse_date(request.args.get("end_date"), "end_date"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(rows), 200
     
\ No newline at end of file
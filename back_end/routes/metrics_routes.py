@@ -0,0 +1,19 @@
+from flask import Blueprint, Response, jsonify
+
+from ..utils.db import pool_status
+from ..utils.metrics import render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def prometheus_metrics():
+    # 段階別・エンドポイント別の処理時間 + 接続プール
+    gauges = {f"ccc_db_pool_{k}": v for k, v in pool_status().items()}
+    return Response(render_metrics(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@metrics_bp.get("/metrics/db_pool")
+def db_pool_metrics():
+    # 接続プールの使用状況 (貸出中の数・待ち時間)
+    return jsonify(pool_status()), 200
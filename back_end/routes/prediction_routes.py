@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from ..services.pred_manager import DataPrepare ,GetPred
+from ..services.pred_manager import DataPrepare ,GetPred, PredCache, BatchPrediction
 
 pred_sales_bp = Blueprint("pred_sales", __name__)
 
@@ -10,7 +10,12 @@ def create_pred_sale():
         return jsonify({"error: invalid date"}), 400
     start = data["start_date"]
     end = data["end_date"]
-    new_p = DataPrepare(start,end)
+    new_p = DataPrepare(
+        start, end,
+        store_id=data.get("store_id"),
+        latitude=data.get("latitude"),
+        longitude=data.get("longitude"),
+    )
     result = new_p.run_prediction()
     return jsonify(result), 201
 
@@ -23,10 +28,39 @@ def get_pred_for_one_week():
     end = start + timedelta(days=7)
     start = datetime.strftime(start,date_format)
     end = datetime.strftime(end,date_format)
-    records = DataPrepare(start, end)
-    result = records.run_prediction()
+    # served from prediction_sales; recomputed in the background when stale
+    result = PredCache.get_range(start, end)
     
    
 
     return jsonify(result), 200
 
+
+@pred_sales_bp.post("/pred_sales_batch")
+def create_pred_sale_batch():
+    # {"jobs": [{"store_id", "latitude", "longitude", "start_date", "end_date"}, ...]}
+    data = request.get_json()
+    if not data or not isinstance(data.get("jobs"), list):
+        return jsonify({"error": "jobs list is required"}), 400
+    try:
+        batch = BatchPrediction(data["jobs"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(batch.run()), 201
+
+
+@pred_sales_bp.post("/model/retrain")
+def start_retrain():
+    from ..ml.training import Retrainer
+    # 学習はバックグラウンド; 状態は GET /model/retrain/<run_id> で確認
+    run = Retrainer.start()
+    return jsonify(run), 202
+
+
+@pred_sales_bp.get("/model/retrain/<run_id>")
+def get_retrain(run_id):
+    from ..ml.training import read_run
+    run = read_run(run_id)
+    if run is None:
+        return jsonify({"error": "run not found"}), 404
+    return jsonify(run), 200
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import IntegrityError
 from ..services.shift_preferences import ShiftPreferences
+from ..utils.pagination import page_args, page_response
+from ..utils.validators import parse_date, parse_int
+from ..services.resource_versions import SHIFT_PRE
+from .conditional import conditional_get
 shift_pre_bp = Blueprint("shift_pre", __name__)
 
 @shift_pre_bp.post("/shift_pre")
@@ -44,6 +48,18 @@ def save_shift_pre():
         
         
 @shift_pre_bp.get("/shift_pre")
+@conditional_get(SHIFT_PRE)
 def get_shift_pre():
-    shift_d = ShiftPreferences.get_shift_pre()
-    return jsonify([r.to_dict() for r in shift_d]), 200
\ No newline at end of file
+    # ?start_date=&end_date=&staff_id=&limit=&cursor=
+    try:
+        limit, cursor = page_args()
+        shift_d, next_cursor = ShiftPreferences.page_shift_pre(
+            start=parse_date(request.args.get("start_date"), "start_date"),
+            end=parse_date(request.args.get("end_date"), "end_date"),
+            staff_id=parse_int(request.args.get("staff_id"), "staff_id"),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return page_response([r.to_dict() for r in shift_d], next_cursor)
\ No newline at end of file
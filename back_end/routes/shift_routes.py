@@ -2,6 +2,15 @@ from flask import Blueprint, request, jsonify
 
 from datetime import datetime, date,timedelta
 from ..services.shift_ass_manager import ShiftAss
+from ..services.shift_jobs import ShiftJobService, DONE
+from ..services.shift_dirty_days import DirtyDays
+from ..services.shift_blocks import ShiftBlocks
+from ..services.resource_versions import SHIFTS, STAFF
+from .conditional import conditional_get
+from ..utils.db import SessionLocal
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 shift_ass_bp = Blueprint("shift_ass" , __name__)
 
@@ -10,9 +19,18 @@ def shift_ass():
     data = request.get_json()
     start = data["start_date"]
     end = data["end_date"]
-    print("check api " , start ,end)
-    s = ShiftAss(start, end)
-    new_rows = s.shift_save_db()
+    logger.info("shift_ass %s - %s", start, end)
+    s = ShiftAss(start, end, store_id=data.get("store_id"))
+    try:
+        # "solver": {"max_time_in_seconds", "num_search_workers", "relative_gap_limit", "random_seed",
+        #            "mode": "auto" | "full" | "decomposed"}
+        # "incremental": true -> 変更のあった日だけ解き直す
+        if data.get("incremental"):
+            new_rows = s.shift_update_db(solver_options=data.get("solver"))
+        else:
+            new_rows = s.shift_save_db(solver_options=data.get("solver"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
    
         
@@ -20,21 +38,105 @@ def shift_ass():
 
 
 
+# ?format=blocks (既定: 連続勤務ブロック) | hours (1時間 = 1行に展開)
+SHIFT_FORMATS = ("blocks", "hours")
+
+
+def _expand_hours():
+    fmt = request.args.get("format", "blocks")
+    if fmt not in SHIFT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(SHIFT_FORMATS)}")
+    return fmt == "hours"
+
+
 @shift_ass_bp.get("/shift_ass_dash_board")
+@conditional_get(SHIFTS, STAFF)
 def shift_ass_dash():
     start = request.args.get("start_date")
     end = request.args.get("end_date")
-    S =  ShiftAss.get_shift_main(start, end)
+    try:
+        expand = _expand_hours()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    S =  ShiftAss.get_shift_main(start, end, expand=expand)
 
     return jsonify(S), 200
 
+@shift_ass_bp.get("/shift_ass_dirty_days")
+def shift_ass_dirty_days():
+    start = request.args.get("start_date")
+    end = request.args.get("end_date")
+    if not start or not end:
+        return "Missing parameters", 400
+    with SessionLocal() as db:
+        days = DirtyDays.pending(db, start, end)
+    return jsonify([d.isoformat() for d in days]), 200
+
+@shift_ass_bp.get("/shift_ass_understaffing")
+@conditional_get(SHIFTS, STAFF)
+def shift_ass_understaffing():
+    # 保存済みシフトで人手不足 / 責任者不在の時間帯
+    start = request.args.get("start_date")
+    end = request.args.get("end_date")
+    if not start or not end:
+        return "Missing parameters", 400
+    with SessionLocal() as db:
+        slots = ShiftBlocks.understaffing(db, start, end)
+    return jsonify(slots), 200
+
 @shift_ass_bp.get("/shift_ass_data_main")
+@conditional_get(SHIFTS, STAFF)
 def shift_ass_main():
     
     start = request.args.get('start_date')
     end = request.args.get('end_date')
     if not start or not end:
         return "Missing parameters", 400
-    shift_ass_main = ShiftAss.get_shift_main(start,end)
+    try:
+        expand = _expand_hours()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    shift_ass_main = ShiftAss.get_shift_main(start,end, expand=expand)
     
-    return jsonify(shift_ass_main), 200
\ No newline at end of file
+    return jsonify(shift_ass_main), 200
+
+
+# =========================================================
+# 非同期ジョブ (ソルバーは別プロセスで実行)
+# =========================================================
+@shift_ass_bp.post("/shift_ass_jobs")
+def submit_shift_job():
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "invalid json"}), 400
+    try:
+        job = ShiftJobService.submit(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202, {"Location": f"/shift_ass_jobs/{job.id}"}
+
+
+@shift_ass_bp.get("/shift_ass_jobs/<job_id>")
+def get_shift_job(job_id):
+    job = ShiftJobService.get_job(job_id)
+    if not job:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@shift_ass_bp.get("/shift_ass_jobs/<job_id>/result")
+def get_shift_job_result(job_id):
+    job = ShiftJobService.get_job(job_id)
+    if not job:
+        return jsonify({"error": "job not found"}), 404
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 409
+    return jsonify(job.result), 200
+
+
+@shift_ass_bp.delete("/shift_ass_jobs/<job_id>")
+def cancel_shift_job(job_id):
+    job = ShiftJobService.cancel(job_id)
+    if not job:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job.to_dict()), 200
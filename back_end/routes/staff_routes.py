@@ -1,26 +1,44 @@
 from flask import Blueprint, request, jsonify
 from ..services.staff_manager import StaffService
+from ..utils.pagination import page_args, page_response
+from ..utils.validators import parse_int
+from ..services.resource_versions import STAFF
+from .conditional import conditional_get
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 staff_bp = Blueprint("staff", __name__)
 
 @staff_bp.get("/staff")
+@conditional_get(STAFF)
 def get_all_staff():
-    staff_list = StaffService.get_all_staff()
-    print("staff routes loaded", staff_list)
-    return jsonify([s.to_dict() for s in staff_list]) ,200
+    # ?status=&level=&limit=&cursor=
+    try:
+        limit, cursor = page_args()
+        staff_list, next_cursor = StaffService.page_staff(
+            status=request.args.get("status") or None,
+            level=parse_int(request.args.get("level"), "level"),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return page_response(staff_list, next_cursor)
 
 @staff_bp.get("/staff/<int:staff_id>")
+@conditional_get(STAFF)
 def get_staff(staff_id):
-    s = StaffService.get_staff_by_id(staff_id)
+    s = StaffService.get_staff_info(staff_id)
     if not s:
         return jsonify({"error": "staff not found"}), 404
-    return jsonify(s.to_dict()), 200
+    return jsonify(s), 200
 
 
 @staff_bp.post("/staff")
 def create_staff():
     data = request.get_json()
-    print("check data " , data)
+    logger.debug("create staff: %s", data)
     if not data:
         return jsonify({"error": "invalid json"}), 400
     
@@ -1,15 +1,24 @@
 from sqlalchemy.orm import Session
 from ..models.daily_report_model import Daily_data
 from ..utils.db import get_db
+from ..utils.pagination import paginate
+from .resource_versions import ResourceVersions, DAILY_REPORT
+from .daily_rollups import DailyRollups
+from datetime import datetime
 
 
 class DailyReport:
     
     @staticmethod
     def create_daily_report(data : dict):
+        try:
+            day = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        except (TypeError, ValueError) as e:
+            raise ValueError("date must be YYYY-MM-DD") from e
+
         db: Session = next(get_db())
         new_data = Daily_data(
-            date = data["date"],
+            date = day,
             day  = data["day"],
             is_event=bool(data["event"]),
             customer_count = data["customer_count"],
@@ -19,12 +28,26 @@ class DailyReport:
         )
         
         db.add(new_data)
+        # 集計テーブルも同じトランザクションで加算
+        DailyRollups.add(db, new_data)
+        ResourceVersions.bump(db, DAILY_REPORT)
         db.commit()
         db.refresh(new_data)
         return new_data
     
     
     @staticmethod
-    def get_daily_report():
+    def get_daily_report(start=None, end=None, cursor=None, limit=None):
+        """(rows, next_cursor), newest date first."""
+        db : Session = next(get_db())
+        q = db.query(Daily_data)
+        if start is not None:
+            q = q.filter(Daily_data.date >= start)
+        if end is not None:
+            q = q.filter(Daily_data.date <= end)
+        return paginate(q, [Daily_data.date, Daily_data.id], cursor, limit, descending=True)
+
+    @staticmethod
+    def get_rollups(grain, start=None, end=None):
         db : Session = next(get_db())
-        return db.query(Daily_data).all()
\ No newline at end of file
+        return DailyRollups.get(db, grain, start, end)
\ No newline at end of file
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from ..models.daily_rollup_model import DailyRollup
+from ..utils.db import bulk_upsert
+
+
+GRAINS = ("day", "week", "month", "weekday")
+COUNTERS = ("report_count", "event_days", "sales_sum", "customer_sum", "staff_count_sum")
+
+
+def rollup_keys(day):
+    """(grain, period_start, weekday) of every rollup row a report on `day` feeds."""
+    month = day.replace(day=1)
+    return [
+        ("day", day, -1),
+        ("week", day - timedelta(days=day.weekday()), -1),
+        ("month", month, -1),
+        ("weekday", month, day.weekday()),
+    ]
+
+
+def rollup_rows(reports):
+    """Rollup rows (dicts with counters) for (date, is_event, customers, sales, staff) tuples."""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for day, is_event, customers, sales, staff in reports:
+        for key in rollup_keys(day):
+            t = totals[key]
+            t["report_count"] += 1
+            t["event_days"] += int(bool(is_event))
+            t["sales_sum"] += int(sales or 0)
+            t["customer_sum"] += int(customers or 0)
+            t["staff_count_sum"] += int(staff or 0)
+    now = datetime.now()
+    return [
+        {"grain": g, "period_start": p, "weekday": w, **t, "updated_at": now}
+        for (g, p, w), t in totals.items()
+    ]
+
+
+def _with_ratios(row):
+    n = row["report_count"] or 1
+    return {
+        **row,
+        "sales_avg": round(row["sales_sum"] / n, 1),
+        "customers_avg": round(row["customer_sum"] / n, 1),
+        "staff_avg": round(row["staff_count_sum"] / n, 2),
+        "sales_per_customer": (
+            round(row["sales_sum"] / row["customer_sum"], 1) if row["customer_sum"] else None
+        ),
+        "sales_per_staff": (
+            round(row["sales_sum"] / row["staff_count_sum"], 1) if row["staff_count_sum"] else None
+        ),
+    }
+
+
+class DailyRollups:
+    """Pre-aggregated daily report totals by day, ISO week, month and weekday.
+
+    ``add`` runs in the caller's transaction, so a report and its rollups
+    are committed together; reads touch a few hundred rows per year at most.
+    """
+
+    @staticmethod
+    def add(db, report):
+        rows = rollup_rows([(
+            report.date, report.is_event, report.customer_count,
+            report.sales, report.staff_count,
+        )])
+        bulk_upsert(
+            db, DailyRollup, rows,
+            ["grain", "period_start", "weekday"], ["updated_at"], increment_columns=COUNTERS,
+        )
+
+    @staticmethod
+    def get(db, grain, start=None, end=None):
+        """Rollups of `grain` whose period starts in [start, end], oldest first.
+
+        ``weekday`` sums its per-month rows over the range, giving 7 rows.
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"grain must be one of {', '.join(GRAINS)}")
+
+        filters = [DailyRollup.grain == grain]
+        if start is not None:
+            filters.append(DailyRollup.period_start >= start)
+        if end is not None:
+            filters.append(DailyRollup.period_start <= end)
+
+        if grain != "weekday":
+            rows = db.query(DailyRollup).filter(*filters).order_by(DailyRollup.period_start)
+            return [_with_ratios(r.to_dict()) for r in rows]
+
+        cols = [func.sum(getattr(DailyRollup, c)).label(c) for c in COUNTERS]
+        rows = (
+            db.query(DailyRollup.weekday, *cols)
+            .filter(*filters)
+            .group_by(DailyRollup.weekday)
+            .order_by(DailyRollup.weekday)
+            .all()
+        )
+        return [
+            _with_ratios({
+                "grain": grain,
+                "weekday": r.weekday,
+                **{c: int(getattr(r, c) or 0) for c in COUNTERS},
+            })
+            for r in rows
+        ]
@@ -1,28 +1,41 @@
 from sqlalchemy.orm import Session
 from ..models.pred_sales_model import Pred_sales
-from ..utils.db import get_db
+from ..utils.db import get_db, bulk_upsert, remove_session
+from ..ml.model_loader import sales_model_registry
+from ..config.config import (
+    PRED_CACHE_TTL_SECONDS, DEFAULT_STORE_ID, DEFAULT_LATITUDE, DEFAULT_LONGITUDE
+)
+from ..ml.calendar_features import calendar_features
+from .weather_store import WeatherStore
+from ..utils.logger import get_logger
+from ..utils.metrics import span, timed
 
 
 
 from datetime import datetime, timedelta
 import os
-import json
+import threading
 import pandas as pd
-import requests_cache
-from openmeteo_requests import Client
-from retry_requests import retry
-import joblib
+
+logger = get_logger(__name__)
+
 
 class DataPrepare:
 
-    def __init__(self, start_date, end_date, date_format="%Y-%m-%d"):
+    FEATURES = [
+        "month", "day", "weekday", "temperature", "rain","weather","festival","season"
+    ]
+
+    def __init__(self, start_date, end_date, date_format="%Y-%m-%d",
+                 store_id=None, latitude=None, longitude=None):
         self.start_date = start_date
         self.end_date = end_date
         self.date_format = date_format
 
-    
-        self.latitude = 35.6895
-        self.longitude = 139.6917
+        # 店舗ごとの位置 (未指定なら既定店舗 = 東京)
+        self.store_id = DEFAULT_STORE_ID if store_id is None else int(store_id)
+        self.latitude = DEFAULT_LATITUDE if latitude is None else float(latitude)
+        self.longitude = DEFAULT_LONGITUDE if longitude is None else float(longitude)
 
  
     @property
@@ -51,79 +64,32 @@ class DataPrepare:
             return os.getcwd()
 
    
-    @property
-    def festival_md_set(self):
-        data_dir = os.path.normpath(os.path.join(self.file_path, "../data"))
-        fes_path = os.path.join(data_dir, "festival_date.json")
-
-        if not os.path.exists(fes_path):
-            raise FileNotFoundError(f"{fes_path} not found")
-
-        with open(fes_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # {"date": ["4-20", "5-9", ...]}
-        return set(data["date"])
+    @timed("festival_features")
+    def calendar_table(self):
+        # cached per date range; rebuilt only when festival_date.json changes
+        return calendar_features.build(self.start_date_obj, self.end_date_obj)
 
     def check_festival_range(self):
-        current = self.start_date_obj
-        end = self.end_date_obj
-
-        result = []
-        while current <= end:
-            md = current.strftime("%m-%d")
-            result.append(1 if md in self.festival_md_set else 0)
-            current += timedelta(days=1)
-
-        return result
+        return self.calendar_table()["festival"].tolist()
 
   
+    @timed("weather_fetch")
     def weather_data(self):
-        cache_session = requests_cache.CachedSession(".cache", expire_after=3600)
-        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-        openmeteo = Client(session=retry_session)
-        start = self.start_date_obj + timedelta(days=1)
-        end  = self.end_date_obj+ timedelta(days=1)
-        params = {
-            "latitude": self.latitude,
-            "longitude": self.longitude,
-            "daily": [
-                "rain_sum",
-                "snowfall_sum",
-                "weather_code",
-                "temperature_2m_max",
-            ],
-            "timezone": "Asia/Tokyo",
-            "start_date": start.strftime("%Y-%m-%d")  ,
-            "end_date": end.strftime("%Y-%m-%d") 
-        }
-        print("params")
-        print(params)
-        responses = openmeteo.weather_api(
-            "https://api.open-meteo.com/v1/forecast", params=params
+        store = WeatherStore(self.latitude, self.longitude)
+        return self.weather_frame(
+            store.get_range(self.start_date_obj, self.end_date_obj)
         )
-        if not responses:
-            return pd.DataFrame()
-
-        daily = responses[0].Daily()
-
-        df = pd.DataFrame({
-            "date": pd.date_range(
-                start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-                periods=len(daily.Variables(0).ValuesAsNumpy()),
-                freq=pd.Timedelta(seconds=daily.Interval()),
-            ).tz_localize(None),
-            "rain": daily.Variables(0).ValuesAsNumpy(),
-            "snowfall": daily.Variables(1).ValuesAsNumpy(),
-            "temperature": daily.Variables(3).ValuesAsNumpy(),
-            "weather": [
-                self.weather_code_to_str(c)
-                for c in daily.Variables(2).ValuesAsNumpy()
-            ],
-        })
-        print("weather")
-        print(df)
-        return df
+
+    @classmethod
+    def weather_frame(cls, store_df):
+        """WeatherStore rows -> model weather columns."""
+        df = store_df.copy()
+        df["date"] = pd.to_datetime(df["date"])
+        df["weather"] = [
+            None if pd.isna(c) else cls.weather_code_to_str(c)
+            for c in df["weather_code"]
+        ]
+        return df[["date", "rain", "snowfall", "temperature", "weather"]]
 
     @staticmethod
     def weather_code_to_str(code):
@@ -137,35 +103,9 @@ class DataPrepare:
             return "Snowy"
         
         
-    def pred_from_model(self,is_festival, weather_df):
-        """Predict sales using trained ML model and merged features."""
-        
-        date_range = pd.date_range(
-            
-            start=self.start_date_obj,
-            end=self.end_date_obj
-        )
-
-        df = pd.DataFrame({
-            "date": date_range,
-            "festival": is_festival
-        })
-
-        df["weekday"] = df["date"].dt.day_name()
-        df["month"] = df["date"].dt.month
-        df["day"] = df["date"].dt.day
-
-        def assign_season(month):
-            if month in [12, 1, 2]:
-                return "winter"
-            elif month in [3, 4, 5]:
-                return "spring"
-            elif month in [6, 7, 8]:
-                return "summer"
-            else:
-                return "autumn"
-
-        df["season"] = df["month"].apply(assign_season)
+    def feature_frame(self, calendar_df, weather_df):
+        """Calendar rows merged with weather; one row per day."""
+        df = calendar_df.copy()
 
         # Load season encoder safely
         #season_encoder_path = os.path.join(self.model_dir, 'xgb_season_encoder.pkl')
@@ -174,70 +114,175 @@ class DataPrepare:
         #season_encoder = joblib.load(season_encoder_path)
         #df["season"] = season_encoder.transform(df["season"])
         df["date"] = df["date"].dt.date
+        weather_df = weather_df.copy()
         weather_df["date"] = weather_df["date"].dt.date
         # Merge with weather
-        df = df.merge(weather_df, on="date", how="left")
-        print("Merged DataFrame for prediction:")
-        print(df)
-        features = [
-            "month", "day", "weekday", "temperature", "rain","weather","festival","season"
-        ]
-        model_input = df[features]
-        print("Model input features:")
-        print(model_input)
-        data_dir = os.path.normpath(os.path.join(self.file_path, "../data"))
-        model_path = os.path.join(data_dir, "xgb_sales_model.joblib")
-        
-        model = joblib.load(model_path)
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Sales model not found at {model}")
-       
+        return df.merge(weather_df, on="date", how="left")
 
-        df["predicted_sales"] = model.predict(model_input)
+    def pred_from_model(self, calendar_df, weather_df):
+        """Predict sales using trained ML model and merged features."""
+        df = self.feature_frame(calendar_df, weather_df)
+        model_input = df[self.FEATURES]
+        logger.debug("model input features:\n%s", model_input)
+        # loaded once per process; reloaded only when the artifact changes
+        with span("model_load"):
+            model, model_version = sales_model_registry.get()
+
+        with span("predict"):
+            df["predicted_sales"] = model.predict(model_input)
         df["predicted_sales"] = df["predicted_sales"].astype(int)
-        result = df[["date", "predicted_sales"]].to_dict(orient="records")
+        df["model_version"] = model_version
+        result = df[["date", "predicted_sales", "model_version"]].to_dict(orient="records")
 
-        print(result)
+        logger.debug("predicted sales: %s", result)
         return result
 
     def run_prediction(self):
-        is_festival = self.check_festival_range()
+        calendar_df = self.calendar_table()
         weather_df = self.weather_data()
-        result = self.pred_from_model(is_festival, weather_df)
+        result = self.pred_from_model(calendar_df, weather_df)
         self.save_pred_sales(result)
         return result
 
+    @timed("db_save_predictions")
     def save_pred_sales(self, result):
-        db: Session = next(get_db())
+        """Upsert the whole horizon in a single INSERT ... ON CONFLICT."""
+        self.upsert_pred_rows([
+            {
+                "store_id": self.store_id,
+                "date": row["date"],
+                "predicted_sales": row["predicted_sales"],
+                "model_version": row.get("model_version"),
+            }
+            for row in result
+        ])
 
-        for row in result:
-            existing = (
-                db.query(Pred_sales)
-                .filter(Pred_sales.date == row["date"])
-                .first()
+    @staticmethod
+    def upsert_pred_rows(records):
+        db: Session = next(get_db())
+        now = datetime.now()
+
+        rows = [
+            {
+                "store_id": int(r["store_id"]),
+                "date": r["date"],
+                "pred_sales": float(r["predicted_sales"]),
+                "model_version": r.get("model_version"),
+                "updated_at": now,
+            }
+            for r in records
+        ]
+        try:
+            bulk_upsert(
+                db, Pred_sales, rows,
+                index_elements=["store_id", "date"],
+                update_columns=["pred_sales", "model_version", "updated_at"],
             )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+
+class BatchPrediction:
+    """Forecast many (store, location, date range) jobs at once.
+
+    Weather is fetched once per distinct location over the union of its
+    jobs' ranges, the calendar table is built once for the overall span,
+    and every job's rows go through a single ``model.predict`` call and a
+    single upsert.
+    """
+
+    def __init__(self, jobs):
+        if not jobs:
+            raise ValueError("jobs must be a non-empty list")
+        try:
+            self.jobs = [
+                DataPrepare(
+                    j["start_date"], j["end_date"],
+                    store_id=j.get("store_id"),
+                    latitude=j.get("latitude"),
+                    longitude=j.get("longitude"),
+                )
+                for j in jobs
+            ]
+        except KeyError as e:
+            raise ValueError(f"job is missing {e.args[0]}") from e
+
+        for job in self.jobs:
+            if job.start_date_obj > job.end_date_obj:
+                raise ValueError(f"start_date after end_date: {job.start_date} - {job.end_date}")
+
+    def weather_by_location(self):
+        spans = {}
+        for job in self.jobs:
+            key = (job.latitude, job.longitude)
+            lo, hi = spans.get(key, (job.start_date_obj, job.end_date_obj))
+            spans[key] = (min(lo, job.start_date_obj), max(hi, job.end_date_obj))
+
+        return {
+            key: DataPrepare.weather_frame(WeatherStore(*key).get_range(lo, hi))
+            for key, (lo, hi) in spans.items()
+        }
+
+    def feature_matrix(self):
+        start = min(job.start_date_obj for job in self.jobs)
+        end = max(job.end_date_obj for job in self.jobs)
+        calendar = calendar_features.build(start, end)
+        weather = self.weather_by_location()
 
-            if existing:
-                existing.pred_sales = row["predicted_sales"]
-            else:
-                db.add(Pred_sales(
-                    date=row["date"],
-                    pred_sales=row["predicted_sales"]
-                ))
+        frames = []
+        for i, job in enumerate(self.jobs):
+            in_range = calendar["date"].between(
+                pd.Timestamp(job.start_date_obj), pd.Timestamp(job.end_date_obj)
+            )
+            df = job.feature_frame(calendar[in_range], weather[(job.latitude, job.longitude)])
+            df["job"] = i
+            df["store_id"] = job.store_id
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True)
+
+    def run(self):
+        df = self.feature_matrix()
+
+        model, model_version = sales_model_registry.get()
+        df["predicted_sales"] = model.predict(df[DataPrepare.FEATURES]).astype(int)
+        df["model_version"] = model_version
+
+        # overlapping jobs for the same store must not hit one row twice
+        rows = df.drop_duplicates(["store_id", "date"], keep="last")
+        DataPrepare.upsert_pred_rows(
+            rows[["store_id", "date", "predicted_sales", "model_version"]]
+            .to_dict(orient="records")
+        )
 
-        db.commit()
+        results = []
+        for i, job in enumerate(self.jobs):
+            part = df[df["job"] == i]
+            results.append({
+                "store_id": job.store_id,
+                "latitude": job.latitude,
+                "longitude": job.longitude,
+                "start_date": job.start_date,
+                "end_date": job.end_date,
+                "predictions": part[["date", "predicted_sales", "model_version"]]
+                .to_dict(orient="records"),
+            })
+        return results
 
 
 
         
 class GetPred:
-    def get_one_week_pred(start,end):
+    def get_one_week_pred(start,end, store_id=DEFAULT_STORE_ID):
         db:Session = next(get_db())
         
         return (
             db.query(Pred_sales)
-            .filter(Pred_sales.date.between(start, end))
-            .distinct(Pred_sales.date)
+            .filter(
+                Pred_sales.store_id == store_id,
+                Pred_sales.date.between(start, end),
+            )
             .order_by(Pred_sales.date)
             .all()
             )
@@ -246,3 +291,70 @@ class GetPred:
         db:Session = next(get_db())
         
         db.query(Pred_sales).all()
+
+
+
+class PredCache:
+    """Read-through cache over ``prediction_sales`` for the dashboard.
+
+    Fresh rows (younger than PRED_CACHE_TTL_SECONDS and produced by the
+    current model) are served with one indexed range read. Stale rows are
+    still returned, and a single background refresh per range recomputes
+    them. Only a range with missing days is computed inline.
+    """
+
+    _refreshing = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _to_record(row):
+        return {
+            "date": row.date,
+            "predicted_sales": int(row.pred_sales),
+            "model_version": row.model_version,
+        }
+
+    @classmethod
+    def is_stale(cls, row, now, model_version):
+        if row.updated_at is None:
+            return True
+        if row.model_version != model_version:
+            return True
+        return now - row.updated_at > timedelta(seconds=PRED_CACHE_TTL_SECONDS)
+
+    @classmethod
+    def get_range(cls, start, end, store_id=DEFAULT_STORE_ID):
+        prepare = DataPrepare(start, end, store_id=store_id)
+        start_d, end_d = prepare.start_date_obj, prepare.end_date_obj
+
+        rows = GetPred.get_one_week_pred(start_d, end_d, store_id)
+        if len(rows) < (end_d - start_d).days + 1:
+            # cold cache: nothing sensible to serve yet
+            return prepare.run_prediction()
+
+        now = datetime.now()
+        model_version = sales_model_registry.version
+        if any(cls.is_stale(r, now, model_version) for r in rows):
+            cls.refresh_in_background(start, end, store_id)
+
+        return [cls._to_record(r) for r in rows]
+
+    @classmethod
+    def refresh_in_background(cls, start, end, store_id=DEFAULT_STORE_ID):
+        key = (store_id, start, end)
+        with cls._lock:
+            if key in cls._refreshing:
+                return
+            cls._refreshing.add(key)
+
+        def refresh():
+            try:
+                DataPrepare(start, end, store_id=store_id).run_prediction()
+            except Exception as e:
+                logger.exception("Background prediction refresh failed (%s - %s): %s", start, end, e)
+            finally:
+                remove_session()
+                with cls._lock:
+                    cls._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from ..models.resource_version_model import ResourceVersion
+from ..utils.db import bulk_upsert
+
+
+SHIFTS = "shifts"
+STAFF = "staff"
+SHIFT_PRE = "shift_pre"
+DAILY_REPORT = "daily_report"
+RESOURCES = (SHIFTS, STAFF, SHIFT_PRE, DAILY_REPORT)
+
+
+class ResourceVersions:
+    """Per-resource write counters shared by every worker (ETag source).
+
+    Writers call ``bump`` with their own session before committing, so
+    the new version becomes visible together with the data it describes.
+    """
+
+    @staticmethod
+    def bump(db, *names):
+        now = datetime.now()
+        for name in names:
+            updated = db.query(ResourceVersion).filter(ResourceVersion.name == name).update(
+                {ResourceVersion.version: ResourceVersion.version + 1,
+                 ResourceVersion.updated_at: now},
+                synchronize_session=False,
+            )
+            if not updated:
+                # 行はマイグレーションで作るので通常ここには来ない
+                bulk_upsert(
+                    db, ResourceVersion,
+                    [{"name": name, "version": 1, "updated_at": now}],
+                    ["name"], ["version", "updated_at"],
+                )
+
+    @staticmethod
+    def current(db, names):
+        """{name: version}; resources never written are 0. One primary-key read."""
+        rows = db.query(ResourceVersion.name, ResourceVersion.version).filter(
+            ResourceVersion.name.in_(list(names))
+        ).all()
+        versions = dict.fromkeys(names, 0)
+        versions.update({name: version for name, version in rows})
+        return versions
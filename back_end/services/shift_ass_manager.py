@@ -1,23 +1,39 @@
 from sqlalchemy.orm import Session
-from pprint import pprint
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
 
 from ortools.sat.python import cp_model
 
-from back_end.models.shift_model import ShiftMain
 from back_end.utils.db import get_db
-from back_end.services.staff_manager import StaffService
+from back_end.services.staff_directory import staff_directory
 from back_end.services.shift_preferences import ShiftPreferences
 from back_end.services.pred_manager import DataPrepare
+from back_end.services.shift_problem import ShiftProblem, ShiftModel, SolverSettings
+from back_end.services.shift_decompose import DecomposedSolver, FEASIBLE_STATUSES
+from back_end.services.shift_dirty_days import DirtyDays
+from back_end.services.shift_blocks import ShiftBlocks, HELP_STAFF_ID, HELP_INFO
+from back_end.services.resource_versions import ResourceVersions, SHIFTS
+from back_end.utils.logger import get_logger
+from back_end.utils.metrics import span, timed
+from back_end.config.config import SOLVER_HINT_LOOKBACK_WEEKS, SHIFT_DECOMPOSE_MIN_DAYS
+from back_end.services.shift_tables import (
+    tables_for_store, normalize_status, HOURS, HOUR_START, HOUR_END, STATUS_HOUR_LIMITS
+)
+
+
+logger = get_logger(__name__)
 
 
 class ShiftAss:
-    def __init__(self,start_date,end_date):
+    def __init__(self,start_date,end_date, store_id=None):
         self.start_date = start_date
         self.end_date = end_date
-        self.help_id = 1500  
+        self.store_id = store_id
+        # 計算開始時刻: これより後に入った変更の印は消さない
+        self.started_at = None
+        # 時間帯別の売上比率・レベル別時給 (配列で引く)
+        self.demand_table, self.wage_table = tables_for_store(store_id)
         self.model = cp_model.CpModel()
         self.work = {}
         self.cost = {}
@@ -26,9 +42,16 @@ class ShiftAss:
     # =========================================================
     # STAFF DATA
     # =========================================================
-    def get_staff_data_df(self):
-        staff = StaffService.get_all_staff()
-        df = pd.DataFrame([s.to_dict() for s in staff])
+    def get_staff_data_df(self, ids=None):
+        # プロセス内のスタッフ名簿から (DB は変更があった時だけ)
+        if ids is None:
+            staff = list(staff_directory.all().values())
+        else:
+            staff = staff_directory.many(int(i) for i in ids)
+        df = pd.DataFrame(
+            staff,
+            columns=["id", "name", "age", "level", "status", "e_mail", "gender"],
+        )
        
         return df
 
@@ -36,14 +59,14 @@ class ShiftAss:
     # SHIFT PREFERENCES
     # =========================================================
     def get_shift_pre_df(self):
-        shift_pre = ShiftPreferences.get_shift_pre()
-        df = pd.DataFrame([s.to_dict() for s in shift_pre])
+        # 期間の絞り込みは SQL 側で
+        shift_pre = ShiftPreferences.get_shift_pre(self.start_date, self.end_date)
+        df = pd.DataFrame(
+            [s.to_dict() for s in shift_pre],
+            columns=["shift_id", "staff_id", "date", "start_time", "end_time"],
+        )
 
         df["date"] = pd.to_datetime(df["date"])
-        df = df[
-            (df["date"] >= pd.to_datetime(self.start_date)) &
-            (df["date"] <= pd.to_datetime(self.end_date))
-        ]
 
         df = df.rename(columns={"staff_id": "id"})
         return df
@@ -52,7 +75,7 @@ class ShiftAss:
     # PREDICTED SALES
     # =========================================================
     def get_pred_sale(self):
-        pred = DataPrepare(self.start_date, self.end_date)
+        pred = DataPrepare(self.start_date, self.end_date, store_id=self.store_id)
         df = pd.DataFrame(pred.run_prediction())
         df["date"] = pd.to_datetime(df["date"])
         return df
@@ -60,35 +83,34 @@ class ShiftAss:
     # =========================================================
     # HELPERS
     # =========================================================
-    def pred_sales_per_hour(self, hour, sales):
-        if hour in [9, 10]:
-            return sales * 0.052
-        elif hour in [12, 13, 14, 15]:
-            return sales * 0.1
-        elif hour in [16, 17]:
-            return sales * 0.07
-        elif hour in [18, 19, 20 ,23]:
-            return sales * 0.08
-        else:
-            return sales * 0.09
+    def pred_sales_per_hour(self, hour, sales, weekday=0):
+        return float(self.demand_table.sales_per_hour(hour, sales, weekday))
 
     def salary(self, level):
-        if level in [1, 2]:
-            return 1200
-        elif level == 3:
-            return 1250
-        elif level == 4:
-            return 1400
-        else:
-            return 1500
+        return int(self.wage_table.lookup(level))
+
+    @staticmethod
+    def _hours(times, ceil):
+        """Series of "HH:MM" -> hour as int array (minutes rounded up or down)."""
+        parts = times.astype(str).str.split(":", expand=True).astype(int)
+        hours = parts[0].to_numpy()
+        if ceil:
+            hours = hours + (parts[1].to_numpy() > 0)
+        return hours
 
     # =========================================================
     # COMBINE DATA
     # =========================================================
+    @timed("combine_data")
     def combine_data(self):
+        shift_pre = self.get_shift_pre_df()
+        if shift_pre.empty:
+            # 希望シフトが1件もない期間
+            return pd.DataFrame()
+
         df = pd.merge(
-            self.get_shift_pre_df(),
-            self.get_staff_data_df(),
+            shift_pre,
+            self.get_staff_data_df(shift_pre["id"].unique()),
             how="left",
             on="id"
         )
@@ -106,39 +128,39 @@ class ShiftAss:
         df["status"] = df["status"].fillna("unknown")
         df["predicted_sales"] = df["predicted_sales"].fillna(0)
 
-        records = []
-        for _, row in df.iterrows():
-            for h in range(9, 25):
-                records.append({
-                    "date": row["date"],
-                    "hour": h,
-                    "id": row["id"],
-                    "name": row["name"],
-                    "level": row["level"],
-                    "status": row["status"],
-                    "predicted_sales": row["predicted_sales"],
-                })
-        unique_dates = df["date"].unique()
-        for d in unique_dates:
-            pred_val = df[df["date"] == d]["predicted_sales"].values[0] if not df[df["date"] == d].empty else 0
-            for h in range(9, 25):
-                records.append({
-                    "date": d, "hour": h, "id": 1500,
-                    "name": "not_enough", "level": 0, "salary": 0, 
-                    "predicted_sales": pred_val
-                })
-        final_df = pd.DataFrame(records)
-
-        final_df["pred_sale_per_hour"] = final_df.apply(
-            lambda r: self.pred_sales_per_hour(r["hour"], r["predicted_sales"]),
-            axis=1
+        df = df.reset_index(drop=True)
+        df["status_code"] = df["status"].map(normalize_status)
+
+        # 希望時間帯 [start, end) を営業時間スロットに変換
+        # 開始は切り上げ・終了は切り捨て (丸1時間入れる枠だけ)
+        start_h = self._hours(df["start_time"], ceil=True)
+        end_h = self._hours(df["end_time"], ceil=False)
+        for code, (lo, hi) in STATUS_HOUR_LIMITS.items():
+            is_code = (df["status_code"] == code).to_numpy()
+            start_h = np.where(is_code, np.maximum(start_h, lo), start_h)
+            end_h = np.where(is_code, np.minimum(end_h, hi), end_h)
+        start_h = np.maximum(start_h, HOUR_START)
+        end_h = np.minimum(end_h, HOUR_END)
+        lengths = np.maximum(end_h - start_h, 0)
+
+        # staff x date x hour: 希望枠の中の時間だけ展開 (iterrows なし)
+        cols = ["date", "id", "name", "level", "status", "status_code", "predicted_sales"]
+        final_df = df.loc[df.index.repeat(lengths), cols].reset_index(drop=True)
+        offsets = np.arange(len(final_df)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        final_df["hour"] = np.repeat(start_h, lengths) + offsets
+
+        # [weekday, hour] / [level] の配列参照で一括計算
+        final_df["pred_sale_per_hour"] = self.demand_table.sales_per_hour(
+            final_df["hour"].to_numpy(),
+            final_df["predicted_sales"].to_numpy(),
+            pd.to_datetime(final_df["date"]).dt.dayofweek.to_numpy(),
         )
         """
         final_df["max_cost"] = (
             final_df["pred_sale_per_hour"] * 0.3
         ).astype(int)
         """
-        final_df["salary"] = final_df["level"].apply(self.salary).astype(int)
+        final_df["salary"] = self.wage_table.lookup(final_df["level"].to_numpy())
 
         final_df = final_df.sort_values(
             by=["date", "hour", "id"]
@@ -146,211 +168,303 @@ class ShiftAss:
 
         return final_df
 
+    def slot_frame(self, df):
+        """(date, hour, pred_sale_per_hour) for every slot of the days in `df`."""
+        day_sales = df.drop_duplicates("date")[["date", "predicted_sales"]]
+        slots = day_sales.merge(pd.DataFrame({"hour": HOURS}), how="cross")
+        slots["pred_sale_per_hour"] = self.demand_table.sales_per_hour(
+            slots["hour"].to_numpy(),
+            slots["predicted_sales"].to_numpy(),
+            pd.to_datetime(slots["date"]).dt.dayofweek.to_numpy(),
+        )
+        return slots
+
+    def problem(self, df):
+        # 誰も希望していない時間帯も需要に含める (不足として出す)
+        return ShiftProblem.from_frame(df, self.slot_frame(df))
+
     # =========================================================
     # CREATE SHIFT (CP-SAT)
     # =========================================================
-    def create_shift(self, df=None):
-        model = cp_model.CpModel()
-        if df is None:
-            df = self.combine_data()
-        
-        # 決定変数
-        work = {}
-        for _, row in df.iterrows():
-            s, d, h = row["id"], row["date"], row["hour"]
-            work[s, d, h] = model.NewBoolVar(f"work_{s}_{d}_{h}")
-
-        # スタッフ属性の辞書化 (高速化のため)
-        staff_info = df.drop_duplicates('id').set_index('id')[['level', 'status']].to_dict('index')
-        staff_ids = df["id"].unique()
-        dates = df["date"].unique()
-
-        for (d, h), group in df.groupby(["date", "hour"]):
-            sales = group["pred_sale_per_hour"].iloc[0]
-            
-            # 1. 必要人数の確保 (5000円に1人)
-            num_staff = max(1, int(sales // 5000))
-            slot_vars = [work[row["id"], d, h] for _, row in group.iterrows()]
-            model.Add(sum(slot_vars) == num_staff) 
-
-            # 2. 責任者制約 (L4以上 or Help)
-         
-
-            # 3. Level 3 枠の制約 (L3がいなければL5、L5もいなければHelp)
-            # 「L3 or L5 or Help」が1人以上
-        
-            l4_vars = [work[row["id"], d, h] for _, row in group.iterrows() 
-                       if row["id"] == self.help_id
-                       or staff_info.get(row["id"], {}).get('level') in [3 , 4 ,5]
-                       ]
-            model.Add(sum(l4_vars) >= 1)
+    def create_shift(self, df=None, solver_options=None, problem=None):
+        # 配列化した問題から制約をインデックス参照で生成
+        with span("model_build"):
+            if problem is None:
+                problem = self.problem(self.combine_data() if df is None else df)
+            shift_model = ShiftModel(problem)
+
+        # 既存シフト (同じ日 or 同じ曜日の過去週) を初期解のヒントに
+        hint = self.previous_schedule_hint(problem)
+        if hint is not None:
+            shift_model.add_hints(hint)
+
+        settings = SolverSettings.for_problem(problem, solver_options)
+        with span("solve"):
+            solver, status = shift_model.solve(settings)
+        return solver, status, shift_model
+
+    def solve(self, df, solver_options=None):
+        """(status, problem, (S, D, H) 0/1 grid) using the full or per-day model."""
+        problem = self.problem(df)
+        settings = SolverSettings.for_problem(problem, solver_options)
+        mode = settings.mode
+        if mode == "auto":
+            mode = "decomposed" if problem.n_days >= SHIFT_DECOMPOSE_MIN_DAYS else "full"
+
+        if mode == "full":
+            solver, status, shift_model = self.create_shift(solver_options=solver_options, problem=problem)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                return status, problem, None
+            return status, problem, shift_model.solution(solver)
+
+        # 日ごとに分割して並列に解く (週上限は日ごとの予算に配分)
+        hint = self.previous_schedule_hint(problem)
+        with span("solve"):
+            # 日ごとのモデル作成もワーカー側なのでまとめて計測
+            status, grid = DecomposedSolver(problem, settings, hint=hint).solve()
+        return status, problem, grid
+
+    def previous_schedule_hint(self, problem):
+        """(S, D, H) 0/1 array from the stored schedule, or None if there is none.
+
+        Each day uses the stored schedule for that date when it exists,
+        otherwise the most recent same-weekday date within the lookback.
         """
-            # 3. Level 3 枠の制約 (L3 or L5 or Help が必須)
-            l3_vars = [work[row["id"], d, h] for _, row in group.iterrows() 
-                       if  
-                       or staff_info.get(row["id"], {}).get('level') == 5 
-                       or row["id"] == self.help_id]
-            model.Add(sum(l3_vars) >= 1)
+        if problem.n_days == 0:
+            return None
+        first = pd.Timestamp(problem.dates[0]).date()
+        last = pd.Timestamp(problem.dates[-1]).date()
+        lookback = first - timedelta(weeks=SOLVER_HINT_LOOKBACK_WEEKS)
+
+        db: Session = next(get_db())
+        prev = ShiftBlocks.hour_frame(db, lookback, last)
+        # 営業時間外 (旧データの 24時枠など) は問題の時間軸に無い
+        prev = prev[prev["hour"].isin(HOURS)]
+        if prev.empty:
+            return None
+
+        by_date = {d: g for d, g in prev.groupby("date")}
+        staff_pos = pd.Series(np.arange(problem.n_staff), index=problem.staff_ids)
+
+        hint = np.zeros(problem.available.shape, dtype=np.int8)
+        for d_idx, day in enumerate(problem.dates):
+            day = pd.Timestamp(day).date()
+            source = next(
+                (day - timedelta(weeks=w) for w in range(SOLVER_HINT_LOOKBACK_WEEKS + 1)
+                 if day - timedelta(weeks=w) in by_date),
+                None,
+            )
+            if source is None:
+                continue
+            g = by_date[source]
+            g = g[g["staff_id"].isin(staff_pos.index)]
+            hint[
+                staff_pos[g["staff_id"]].to_numpy(),
+                d_idx,
+                g["hour"].to_numpy() - HOUR_START,
+            ] = 1
+        return hint
+
+    def stored_schedule(self, problem):
+        """(S, D, H) 0/1 array of the stored schedule, and (D,) bool "day has rows"."""
+        grid = np.zeros(problem.available.shape, dtype=np.int8)
+        stored = np.zeros(problem.n_days, dtype=bool)
+        if problem.n_days == 0:
+            return grid, stored
+
+        db: Session = next(get_db())
+        prev = ShiftBlocks.hour_frame(
+            db, pd.Timestamp(problem.dates[0]).date(), pd.Timestamp(problem.dates[-1]).date()
+        )
+        if prev.empty:
+            return grid, stored
+
+        day_pos = pd.Series(
+            np.arange(problem.n_days),
+            index=[pd.Timestamp(d).date() for d in problem.dates],
+        )
+        prev = prev[prev["date"].isin(day_pos.index) & prev["hour"].isin(HOURS)]
+        stored[day_pos[prev["date"].unique()].to_numpy()] = True
+
+        # 削除されたスタッフの行は無視
+        staff_pos = pd.Series(np.arange(problem.n_staff), index=problem.staff_ids)
+        prev = prev[prev["staff_id"].isin(staff_pos.index)]
+        grid[
+            staff_pos[prev["staff_id"]].to_numpy(),
+            day_pos[prev["date"]].to_numpy(),
+            prev["hour"].to_numpy() - HOUR_START,
+        ] = 1
+        return grid, stored
+
+    def understaffing(self, p, grid):
+        """Per-slot table of the hours that are short of people or of a senior."""
+        missing, no_senior = p.shortage(grid)
+        d_idx, h_idx = np.nonzero((missing > 0) | no_senior)
+        return pd.DataFrame({
+            "date": [pd.Timestamp(p.dates[d]).date() for d in d_idx],
+            "hour": p.hours[h_idx].astype(int),
+            "demand": p.demand[d_idx, h_idx],
+            "assigned": grid.sum(axis=0)[d_idx, h_idx],
+            "missing": missing[d_idx, h_idx],
+            "no_senior": no_senior[d_idx, h_idx],
+        })
+
+    def shift_rows(self, p, grid, days=None):
+        """DataFrame of assigned rows in `grid` (only `days` when given).
+
+        Each person missing in a slot adds one ``not_enough`` row
+        (``HELP_STAFF_ID``), which is stored as a block without staff.
         """
-        # 3. 個別・連続性ルール
-        for s in staff_ids:
-            if s == self.help_id: continue
-            status = staff_info.get(s, {}).get('status', 'unknown')
-            if status == "international":
-                # このスタッフの全日付・全時間のwork変数を合計
-                weekly_vars = [work[sid, d, h] for (sid, d, h) in work.keys() if sid == s]
-                model.Add(sum(weekly_vars) <= 28)
-                
-            for d in dates:
-                day_hours = range(9, 25)
-                # この日のこの人の全勤務変数
-                d_vars = [work[s, d, h] for h in day_hours if (s, d, h) in work]
-                if not d_vars: continue
-                
-                # 【1時間限定の休憩】を検知する変数
-                break_starts = []
-                for h in day_hours:
-                    if (s, d, h) not in work: continue
-                    if status == "high_school" and h >= 22:
-                        model.Add(work[s, d, h] == 0)
-                    # --- 休憩検知 (1->0) ---
-                    if h > 9 and (s, d, h-1) in work:
-                        is_brk = model.NewBoolVar(f'brk_{s}_{d}_{h}')
-                        # 直前が1 かつ 今が0 の時だけ is_brk=1
-                        model.Add(is_brk >= work[s, d, h-1] - work[s, d, h])
-                        break_starts.append(is_brk)
-                        # 休憩は1時間だけ（次は必ず仕事に戻る）
-                        if (s, d, h+1) in work:
-                            model.Add(work[s, d, h+1] >= is_brk)
-
-                    # --- 【重要】連続勤務は最大5時間まで（6時間連続勤務を禁止） ---
-                    # 誰であっても、6時間連続で「1」が続くことを数学的に禁止する
-                    window_6 = [work[s, d, h + i] for i in range(6) if (s, d, h + i) in work]
-                    if len(window_6) == 6:
-                        model.Add(sum(window_6) <= 5) # 6時間のうち仕事は5時間以内＝必ず1時間は休む
-
-                # --- 1日の合計が6時間を超えたら、必ず1回は休憩を「開始」させる ---
-                if break_starts:
-                    # 休憩開始（1->0）の合計回数を「最大2回」に制限
-                    model.Add(sum(break_starts) <= 3)
-
-                # 4. 6時間超えの勤務なら最低1回は休憩を入れる
-                total_w = sum(work[s, d, h] for h in day_hours)
-                has_long_shift = model.NewBoolVar(f'long_{s}_{d}')
-                model.Add(total_w > 6).OnlyEnforceIf(has_long_shift)
-                model.Add(total_w <= 6).OnlyEnforceIf(has_long_shift.Not())
-                if break_starts:
-                    model.Add(sum(break_starts) >= 1).OnlyEnforceIf(has_long_shift)
-                   
-               
-
-        # 4. 目的関数
-        obj_terms = []
-        for (s, d, h), w in work.items():
-            if s == self.help_id:
-                obj_terms.append(w * 1000)
-            else:
-                obj_terms.append(w * 1)
-
-        model.Minimize(sum(obj_terms))
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 10
-        status = solver.Solve(model)
-        return solver, status, work
-
-    def run(self):
-        df = self.combine_data()
-        solver, status, work = self.create_shift(df)
-        
         # スタッフ情報をIDで引けるように辞書化
-        staff_data = self.get_staff_data_df().set_index('id').to_dict('index')
-        
-        shift_results = []  
-        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            for (s, d, h), w in work.items():
-                if solver.Value(w) == 1:
-                    info = staff_data.get(s, {"name": "not_enough", "level": 0, "status": "help"})
-                    shift_results.append({
-                        "staff_id": s,
-                        "date": d,
-                        "hour": h,
-                        "name": info["name"],
-                        "level": info["level"],
-                        "status": info["status"],
-                        "salary": self.salary(info["level"])
-                    })
+        staff_data = staff_directory.all()
+
+        keep = np.ones(p.n_days, dtype=bool)
+        if days is not None:
+            grid = grid.copy()
+            keep[:] = False
+            keep[list(days)] = True
+            grid[:, ~keep] = 0
+
+        shift_results = []
+        for s_idx, d_idx, h_idx in zip(*np.nonzero(grid)):
+            s = int(p.staff_ids[s_idx])
+            info = staff_data.get(s, HELP_INFO)
+            shift_results.append({
+                "staff_id": s,
+                "date": pd.Timestamp(p.dates[d_idx]).date(),
+                "hour": int(p.hours[h_idx]),
+                "name": info["name"],
+                "level": info["level"],
+                "status": info["status"],
+                "salary": self.salary(info["level"])
+            })
+
+        # 不足人数分の not_enough 行
+        missing, _ = p.shortage(grid)
+        missing[~keep] = 0
+        for d_idx, h_idx in zip(*np.nonzero(missing)):
+            row = {
+                "staff_id": HELP_STAFF_ID,
+                "date": pd.Timestamp(p.dates[d_idx]).date(),
+                "hour": int(p.hours[h_idx]),
+                **HELP_INFO,
+                "salary": self.salary(HELP_INFO["level"]),
+            }
+            shift_results.extend([row] * int(missing[d_idx, h_idx]))
         return pd.DataFrame(shift_results)
 
-    def shift_save_db(self):
-        df = self.run()
-        
+    def run(self, solver_options=None):
+        self.started_at = datetime.now()
+        df = self.combine_data()
+        if df.empty:
+            return pd.DataFrame()
+        status, p, grid = self.solve(df, solver_options)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return pd.DataFrame()
+        self.log_understaffing(p, grid)
+        return self.shift_rows(p, grid)
+
+    def log_understaffing(self, p, grid):
+        table = self.understaffing(p, grid)
+        if not table.empty:
+            logger.warning(
+                "schedule %s..%s is short in %d slots (%d person-hours, %d without a senior)",
+                self.start_date, self.end_date, int((table["missing"] > 0).sum()),
+                int(table["missing"].sum()), int(table["no_senior"].sum()),
+            )
+
+    def run_incremental(self, solver_options=None):
+        """Re-solve only dirty days (and days never solved); other days stay as stored.
+
+        Returns (rows of the re-solved days, dates that were re-solved).
+        Days whose solve fails are left out and stay marked.
+        """
+        self.started_at = datetime.now()
+        db: Session = next(get_db())
+        dirty = set(DirtyDays.pending(db, self.start_date, self.end_date))
+
+        df = self.combine_data()
+        if df.empty:
+            # 希望シフトが1件もない: 印の付いた日は空にする
+            return pd.DataFrame(), sorted(dirty)
+
+        problem = self.problem(df)
+        settings = SolverSettings.for_problem(problem, solver_options)
+        grid, stored = self.stored_schedule(problem)
+
+        day_dates = [pd.Timestamp(d).date() for d in problem.dates]
+        todo = [d for d, day in enumerate(day_dates) if day in dirty or not stored[d]]
+        # 希望シフトが無くなった日は行を消すだけ
+        emptied = sorted(dirty - set(day_dates))
+        if not todo:
+            return pd.DataFrame(), emptied
+
+        # 他の日は固定、対象日だけを1日ずつ解き直す (今の割当をヒントに)
+        with span("solve"):
+            statuses = DecomposedSolver(problem, settings, hint=grid.copy()).resolve(grid, todo)
+        solved = [d for d, status in zip(todo, statuses) if status in FEASIBLE_STATUSES]
+        dates = sorted(emptied + [day_dates[d] for d in solved])
+        return self.shift_rows(problem, grid, days=solved), dates
+
+    def shift_update_db(self, solver_options=None):
+        SolverSettings.parse_overrides(solver_options)
+        df, dates = self.run_incremental(solver_options)
+        if not dates:
+            return "再計算が必要な日はありません"
+        return self.save_days(df, dates)
+
+    def shift_save_db(self, solver_options=None):
+        # 重い処理の前にオプションを検証
+        SolverSettings.parse_overrides(solver_options)
+        df = self.run(solver_options)
+        return self.save_schedule(df)
+
+    @timed("db_save_shifts")
+    def save_schedule(self, df):
         if df.empty:
             
             return "保存するデータがありません"
 
         db: Session = next(get_db())
         try:
-            # 対象期間を削除
-            db.query(ShiftMain).filter(
-                ShiftMain.date >= self.start_date,
-                ShiftMain.date <= self.end_date
-            ).delete()
-            
-            objs = []
-            for row in df.itertuples(index=False):
-                objs.append(
-                    ShiftMain(
-                        date=row.date,
-                        hour=int(row.hour),
-                        staff_id=int(row.staff_id), 
-                        name=row.name,
-                        level=int(row.level),
-                        status=row.status, 
-                        salary=int(row.salary)
-                    )
-                )
-            db.add_all(objs)
+            # 対象期間を削除して連続勤務ブロックで保存
+            ShiftBlocks.replace(db, df, start=self.start_date, end=self.end_date)
+            # 期間全体を解き直したので印も消す
+            DirtyDays.clear(
+                db, start=self.start_date, end=self.end_date, before=self.started_at
+            )
+            ResourceVersions.bump(db, SHIFTS)
+            db.commit()
+            return df.to_dict(orient="records")
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error saving to DB: %s", e)
+            return []
+
+    @timed("db_save_shifts")
+    def save_days(self, df, dates):
+        """Replace the stored blocks of `dates` only and clear their marks."""
+        db: Session = next(get_db())
+        try:
+            ShiftBlocks.replace(db, df, dates=dates)
+            DirtyDays.clear(db, dates=dates, before=self.started_at)
+            ResourceVersions.bump(db, SHIFTS)
             db.commit()
             return df.to_dict(orient="records")
         except Exception as e:
             db.rollback()
-            print(f"Error saving to DB: {e}")
+            logger.exception("Error saving to DB: %s", e)
             return []
            
 
 
     @staticmethod 
-    def get_shift_for_dashboard(start_date, end_date):
+    def get_shift_for_dashboard(start_date, end_date, expand=False):
         db: Session = next(get_db())
-   
-        datas = db.query(ShiftMain).filter(
-            ShiftMain.date == start_date,
-            ShiftMain.date ==  end_date
-        ).all()
-        result = []
-        for d in datas:
-            result.append(d.to_dict()) 
-        return result
-        
-
-   
+        return ShiftBlocks.read(db, start_date, end_date, expand=expand)
+
     @staticmethod
-    def get_shift_main(today, tomorrow):
-        # ... 前半の取得処理 ...
+    def get_shift_main(today, tomorrow, expand=False):
+        """Stored blocks in [today, tomorrow]; hourly rows when `expand`."""
         db: Session = next(get_db())
-        
-
-        datas = db.query(ShiftMain).filter(
-            ShiftMain.date >= today,
-            ShiftMain.date <= tomorrow).all()
-        
-
-       
-        results1 = []
-        for d in datas:
-            
-            results1.append(d.to_dict()) 
-
-        
-        return results1 
- 
\ No newline at end of file
+        return ShiftBlocks.read(db, today, tomorrow, expand=expand)
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from ..models.shift_model import ShiftMain
+from ..models.staff_model import Staff
+from .shift_tables import tables_for_store
+from .shift_problem import SENIOR_LEVELS
+
+
+# 人手不足枠 (不足1人 = 1行)。DB では staff_id = NULL で保存
+HELP_STAFF_ID = 1500
+HELP_INFO = {"name": "not_enough", "level": 0, "status": "help"}
+
+
+class ShiftBlocks:
+    """Stored schedule as contiguous work blocks; hourly rows only on request."""
+
+    @staticmethod
+    def from_hours(df):
+        """Hourly rows (staff_id, date, hour) -> block dicts for ``ShiftMain``.
+
+        Repeated (staff_id, date, hour) rows - several people missing in one
+        slot - are split into lanes, each becoming its own blocks.
+        """
+        if df.empty:
+            return []
+        df = df.assign(lane=df.groupby(["date", "staff_id", "hour"]).cumcount())
+        df = df.sort_values(["date", "staff_id", "lane", "hour"])
+        staff = df["staff_id"].to_numpy()
+        lanes = df["lane"].to_numpy()
+        dates = df["date"].to_numpy()
+        hours = df["hour"].to_numpy().astype(np.int64)
+
+        # スタッフ・日付が変わるか、時間が飛んだら新しいブロック
+        new = np.ones(len(df), dtype=bool)
+        new[1:] = (
+            (staff[1:] != staff[:-1])
+            | (lanes[1:] != lanes[:-1])
+            | (dates[1:] != dates[:-1])
+            | (hours[1:] != hours[:-1] + 1)
+        )
+        starts = np.nonzero(new)[0]
+        ends = np.append(starts[1:], len(df)) - 1
+        return [
+            {
+                "date": dates[i],
+                "staff_id": None if int(staff[i]) == HELP_STAFF_ID else int(staff[i]),
+                "start_hour": int(hours[i]),
+                "end_hour": int(hours[j]) + 1,
+            }
+            for i, j in zip(starts, ends)
+        ]
+
+    @staticmethod
+    def _query(db, start, end):
+        q = db.query(
+            ShiftMain.id, ShiftMain.date, ShiftMain.staff_id,
+            ShiftMain.start_hour, ShiftMain.end_hour,
+        )
+        return q.filter(ShiftMain.date >= start, ShiftMain.date <= end)
+
+    @classmethod
+    def hour_frame(cls, db, start, end):
+        """DataFrame (staff_id, date, hour) of the stored blocks in [start, end]."""
+        rows = cls._query(db, start, end).all()
+        if not rows:
+            # 空の DataFrame は object 型になり np.repeat できない
+            return pd.DataFrame(columns=["staff_id", "date", "hour"])
+        blocks = pd.DataFrame(
+            rows, columns=["id", "date", "staff_id", "start_hour", "end_hour"]
+        )
+        lengths = (blocks["end_hour"] - blocks["start_hour"]).to_numpy().astype(np.int64)
+        hours = blocks.loc[blocks.index.repeat(lengths), ["staff_id", "date"]]
+        hours = hours.reset_index(drop=True)
+        offsets = np.arange(len(hours)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        hours["hour"] = np.repeat(blocks["start_hour"].to_numpy(), lengths) + offsets
+        hours["staff_id"] = hours["staff_id"].fillna(HELP_STAFF_ID).astype(np.int64)
+        return hours
+
+    @classmethod
+    def read(cls, db, start, end, expand=False, store_id=None):
+        """Blocks in [start, end] with staff info; one dict per hour if `expand`."""
+        rows = (
+            cls._query(db, start, end)
+            .add_columns(Staff.name, Staff.level, Staff.status)
+            .outerjoin(Staff, Staff.id == ShiftMain.staff_id)
+            .order_by(ShiftMain.date, ShiftMain.start_hour, ShiftMain.staff_id)
+            .all()
+        )
+        blocks = []
+        for r in rows:
+            info = HELP_INFO if r.staff_id is None else {
+                "name": r.name, "level": r.level, "status": r.status,
+            }
+            blocks.append({
+                "id": r.id,
+                "date": r.date.isoformat(),
+                "staff_id": HELP_STAFF_ID if r.staff_id is None else r.staff_id,
+                "start_hour": r.start_hour,
+                "end_hour": r.end_hour,
+                **info,
+            })
+        if not expand:
+            return blocks
+
+        # 旧形式 (1時間 = 1行) が必要なクライアント向け
+        wage_table = tables_for_store(store_id)[1]
+        hourly = []
+        for b in blocks:
+            salary = int(wage_table.lookup(b["level"] or 0))
+            for hour in range(b["start_hour"], b["end_hour"]):
+                hourly.append({
+                    "id": b["id"],
+                    "date": b["date"],
+                    "hour": hour,
+                    "staff_id": b["staff_id"],
+                    "name": b["name"],
+                    "level": b["level"],
+                    "status": b["status"],
+                    "salary": salary,
+                })
+        hourly.sort(key=lambda h: (h["date"], h["hour"], h["staff_id"]))
+        return hourly
+
+    @classmethod
+    def understaffing(cls, db, start, end):
+        """Slots of the stored schedule in [start, end] short of people or of a senior."""
+        rows = (
+            cls._query(db, start, end)
+            .add_columns(Staff.level)
+            .outerjoin(Staff, Staff.id == ShiftMain.staff_id)
+            .all()
+        )
+        slots = {}
+        for r in rows:
+            for hour in range(r.start_hour, r.end_hour):
+                slot = slots.setdefault((r.date, hour), {"assigned": 0, "missing": 0, "seniors": 0})
+                if r.staff_id is None:
+                    slot["missing"] += 1
+                else:
+                    slot["assigned"] += 1
+                    slot["seniors"] += r.level in SENIOR_LEVELS
+        return [
+            {
+                "date": day.isoformat(),
+                "hour": hour,
+                "assigned": slot["assigned"],
+                "missing": slot["missing"],
+                "no_senior": slot["seniors"] == 0,
+            }
+            for (day, hour), slot in sorted(slots.items())
+            if slot["missing"] or not slot["seniors"]
+        ]
+
+    @classmethod
+    def replace(cls, db, df, start=None, end=None, dates=None):
+        """Delete the stored blocks of the range (or `dates`) and insert `df`'s rows."""
+        q = db.query(ShiftMain)
+        if dates is not None:
+            q = q.filter(ShiftMain.date.in_(list(dates)))
+        else:
+            q = q.filter(ShiftMain.date >= start, ShiftMain.date <= end)
+        q.delete(synchronize_session=False)
+        db.add_all([ShiftMain(**block) for block in cls.from_hours(df)])
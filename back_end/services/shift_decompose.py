@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from back_end.services.shift_problem import (
+    ShiftModel, SolverSettings, STATUS_INTERNATIONAL, WEEKLY_HOUR_CAP
+)
+from back_end.config.config import SHIFT_DECOMPOSE_WORKERS, SHIFT_JOB_START_METHOD
+
+
+# 日をまたぐ制約は留学生の週28時間だけなので、
+# 週の予算を日ごとに配分すれば各日は独立に解ける。
+FEASIBLE_STATUSES = (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+# =========================================================
+# BUDGETS
+# =========================================================
+def allocate_budgets(problem, weekly_cap=WEEKLY_HOUR_CAP):
+    """(S, D) hour budget per staff and day.
+
+    A capped staff member whose available hours in a week exceed the cap
+    gets the cap split across those days in proportion to availability
+    (largest remainder, so the week sums exactly to the cap). Everyone
+    else's budget is simply their available hours.
+    """
+    hours = problem.available.sum(axis=2).astype(np.int64)     # (S, D)
+    budgets = hours.copy()
+    capped = problem.staff_status == STATUS_INTERNATIONAL
+    week = problem.week_of_day()
+
+    for w in np.unique(week):
+        days = np.nonzero(week == w)[0]
+        total = hours[:, days].sum(axis=1)
+        over = np.nonzero(capped & (total > weekly_cap))[0]
+        if len(over) == 0:
+            continue
+        share = hours[np.ix_(over, days)] * weekly_cap / total[over, None]
+        base = np.floor(share).astype(np.int64)
+        left = weekly_cap - base.sum(axis=1)
+        rank = np.argsort(np.argsort(-(share - base), axis=1, kind="stable"), axis=1)
+        budgets[np.ix_(over, days)] = base + (rank < left[:, None])
+    return budgets
+
+
+def _remaining_caps(problem, grid, d, weekly_cap):
+    """Hours each staff member may still work on day d given the other days."""
+    week = problem.week_of_day()
+    same_week = np.nonzero(week == week[d])[0]
+    other = grid[:, same_week].sum(axis=(1, 2)) - grid[:, d].sum(axis=1)
+    return np.maximum(weekly_cap - other, 0)
+
+
+# =========================================================
+# ONE DAY (runs in a worker process)
+# =========================================================
+def solve_day(day_problem, caps, hint, settings):
+    """Solve a one-day subproblem; returns (status, (S, 1, H) grid)."""
+    shift_model = ShiftModel(day_problem, caps=caps.reshape(-1, 1))
+    if hint is not None:
+        shift_model.add_hints(hint)
+    solver, status = shift_model.solve(settings)
+    if status in FEASIBLE_STATUSES:
+        return status, shift_model.solution(solver)
+    return status, None
+
+
+class DecomposedSolver:
+    """Per-day decomposition of a ShiftProblem solved in a process pool.
+
+    1. the weekly caps are split into per-day budgets,
+    2. all days are solved in parallel,
+    3. days that failed, weeks that ended up over the cap, and days that
+       were short of people while a capped staff member still had hours
+       left are re-solved one by one with the hours actually remaining
+       that week.
+    """
+
+    _executor = None
+    _lock = threading.Lock()
+    # 処理プロセスの上限 (ジョブのワーカー内では limit_workers で絞る)
+    worker_limit = SHIFT_DECOMPOSE_WORKERS
+
+    def __init__(self, problem, settings, hint=None, weekly_cap=WEEKLY_HOUR_CAP,
+                 max_workers=None):
+        self.problem = problem
+        self.settings = settings
+        self.hint = hint
+        self.weekly_cap = weekly_cap
+        limit = self.worker_limit if max_workers is None else min(max_workers, self.worker_limit)
+        self.max_workers = max(1, min(limit, problem.n_days))
+
+    @classmethod
+    def limit_workers(cls, n):
+        """Cap the processes this process may start (call before the first solve)."""
+        cls.worker_limit = max(1, int(n))
+
+    @classmethod
+    def executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=cls.worker_limit,
+                    mp_context=multiprocessing.get_context(SHIFT_JOB_START_METHOD),
+                )
+            return cls._executor
+
+    def day_settings(self, day_problem, parallel):
+        # 日ごとの時間上限はサイズ別の既定値 (全体の指定より長くしない)
+        s = self.settings
+        return SolverSettings(
+            min(s.max_time_in_seconds, SolverSettings.time_limit_for(day_problem.n_vars)),
+            num_search_workers=max(1, s.num_search_workers // parallel),
+            relative_gap_limit=s.relative_gap_limit,
+            random_seed=s.random_seed,
+        )
+
+    def _day_args(self, d, caps, parallel):
+        day_problem = self.problem.subset_days([d])
+        hint = None if self.hint is None else self.hint[:, d:d + 1]
+        return day_problem, caps, hint, self.day_settings(day_problem, parallel)
+
+    # =========================================================
+    # SOLVE
+    # =========================================================
+    def solve(self):
+        """(status, (S, D, H) grid); status is FEASIBLE at best."""
+        p = self.problem
+        grid = np.zeros(p.available.shape, dtype=np.int8)
+        statuses = np.full(p.n_days, cp_model.UNKNOWN)
+        if p.n_days == 0:
+            return cp_model.FEASIBLE, grid
+
+        budgets = allocate_budgets(p, self.weekly_cap)
+        args = [self._day_args(d, budgets[:, d], self.max_workers) for d in range(p.n_days)]
+        if self.max_workers > 1:
+            results = list(self.executor().map(solve_day, *zip(*args)))
+        else:
+            results = [solve_day(*a) for a in args]
+
+        for d, (status, day_grid) in enumerate(results):
+            statuses[d] = status
+            if day_grid is not None:
+                grid[:, d] = day_grid[:, 0]
+
+        self.repair(grid, statuses)
+
+        if np.all(np.isin(statuses, FEASIBLE_STATUSES)):
+            # 日ごとの最適解の組合せなので全体としては FEASIBLE
+            return cp_model.FEASIBLE, grid
+        failed = statuses[~np.isin(statuses, FEASIBLE_STATUSES)]
+        return int(failed[0]), grid
+
+    # =========================================================
+    # REPAIR
+    # =========================================================
+    def days_to_repair(self, grid, statuses):
+        p = self.problem
+        capped = p.staff_status == STATUS_INTERNATIONAL
+        week = p.week_of_day()
+        n_weeks = int(week.max()) + 1
+
+        # (S, W) 週の合計時間
+        weekly = np.zeros((p.n_staff, n_weeks), dtype=np.int64)
+        np.add.at(weekly.T, week, grid.sum(axis=2).T)
+
+        todo = set(np.nonzero(~np.isin(statuses, FEASIBLE_STATUSES))[0].tolist())
+        for s, w in zip(*np.nonzero(capped[:, None] & (weekly > self.weekly_cap))):
+            todo.update(np.nonzero((week == w) & (grid[s].sum(axis=1) > 0))[0].tolist())
+
+        # 人手不足の日に、週の枠が残っている留学生が入れるなら解き直す
+        slack = capped[:, None] & (weekly < self.weekly_cap)
+        missing, _ = p.shortage(grid)
+        for d in np.nonzero(missing.sum(axis=1) > 0)[0]:
+            if np.any(slack[:, week[d]] & p.available[:, d].any(axis=1)):
+                todo.add(int(d))
+        return sorted(todo)
+
+    def repair(self, grid, statuses):
+        for d in self.days_to_repair(grid, statuses):
+            caps = _remaining_caps(self.problem, grid, d, self.weekly_cap)
+            status, day_grid = solve_day(*self._day_args(d, caps, 1))
+            if day_grid is not None:
+                grid[:, d] = day_grid[:, 0]
+                statuses[d] = status
+            elif statuses[d] in FEASIBLE_STATUSES:
+                # 今の割当のままで週上限を超えない場合だけ残す
+                if np.any(grid[:, d].sum(axis=1) > caps):
+                    statuses[d] = status
+            else:
+                statuses[d] = status
+
+    # =========================================================
+    # INCREMENTAL
+    # =========================================================
+    def resolve(self, grid, days):
+        """Re-solve only `days` of `grid` in place; every other day stays fixed.
+
+        Days are solved one by one against the weekly hours used on every
+        other day (days not yet re-solved count with their old rows). Returns
+        one status per entry of `days`; a failed day keeps its old row.
+        """
+        statuses = []
+        for d in days:
+            old = grid[:, d].copy()
+            grid[:, d] = 0
+            caps = _remaining_caps(self.problem, grid, d, self.weekly_cap)
+            status, day_grid = solve_day(*self._day_args(d, caps, 1))
+            grid[:, d] = old if day_grid is None else day_grid[:, 0]
+            statuses.append(status)
+        return statuses
@@ -0,0 +1,56 @@
+from datetime import datetime, date
+
+from ..models.shift_dirty_day_model import ShiftDirtyDay
+from ..models.shift_model import ShiftMain
+from ..models.shift_pref_model import ShiftPre
+from ..utils.db import bulk_upsert
+
+
+class DirtyDays:
+    """Days whose stored schedule no longer matches preferences / staff data.
+
+    Writers call ``mark`` with their own session before committing, so the
+    mark is saved in the same transaction as the change that caused it.
+    """
+
+    @staticmethod
+    def mark(db, dates, reason):
+        now = datetime.now()
+        rows = [
+            {"date": d, "reason": reason, "marked_at": now}
+            for d in sorted(set(dates))
+        ]
+        bulk_upsert(db, ShiftDirtyDay, rows, ["date"], ["reason", "marked_at"])
+
+    @staticmethod
+    def staff_dates(db, staff_id, since=None):
+        """Dates from `since` (today) on where the staff member has a preference or a shift."""
+        since = since or date.today()
+        pre = db.query(ShiftPre.date).filter(
+            ShiftPre.staff_id == staff_id, ShiftPre.date >= since
+        )
+        main = db.query(ShiftMain.date).filter(
+            ShiftMain.staff_id == staff_id, ShiftMain.date >= since
+        )
+        return {row[0] for row in pre.union(main).all()}
+
+    @staticmethod
+    def pending(db, start, end):
+        rows = db.query(ShiftDirtyDay.date).filter(
+            ShiftDirtyDay.date >= start,
+            ShiftDirtyDay.date <= end,
+        ).order_by(ShiftDirtyDay.date).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def clear(db, dates=None, start=None, end=None, before=None):
+        """Remove marks for `dates` (or the range), keeping marks newer than `before`."""
+        q = db.query(ShiftDirtyDay)
+        if dates is not None:
+            q = q.filter(ShiftDirtyDay.date.in_(list(dates)))
+        else:
+            q = q.filter(ShiftDirtyDay.date >= start, ShiftDirtyDay.date <= end)
+        if before is not None:
+            # 解いている間に入った変更は次回に回す
+            q = q.filter(ShiftDirtyDay.marked_at <= before)
+        q.delete(synchronize_session=False)
@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+import threading
+import uuid
+
+from back_end.models.shift_job_model import ShiftJob
+from back_end.utils.db import SessionLocal, engine, remove_session
+from back_end.config.config import (
+    SHIFT_JOB_WORKERS, SHIFT_JOB_START_METHOD, SHIFT_JOB_DECOMPOSE_WORKERS,
+)
+from back_end.services.shift_decompose import DecomposedSolver
+from back_end.services.shift_problem import SolverSettings
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+# =========================================================
+# WORKER PROCESS
+# =========================================================
+def _init_worker():
+    # connections inherited through fork must not be shared with the parent
+    engine.dispose(close=False)
+    # 各ジョブが CPU 数ぶんの日ごとのプロセスを立てないように
+    DecomposedSolver.limit_workers(SHIFT_JOB_DECOMPOSE_WORKERS)
+
+
+def _job_status(db, job_id):
+    db.expire_all()
+    job = db.get(ShiftJob, job_id)
+    return job.status if job else None
+
+
+def _jsonable(records):
+    return [
+        {k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in r.items()}
+        for r in records
+    ]
+
+
+def run_shift_job(job_id):
+    """Entry point executed in the process pool."""
+    try:
+        _run_shift_job(job_id)
+    finally:
+        # ShiftAss のサービスが使ったスレッド単位のセッションを閉じる
+        remove_session()
+
+
+def _run_shift_job(job_id):
+    from back_end.services.shift_ass_manager import ShiftAss
+
+    with SessionLocal() as db:
+        job = db.get(ShiftJob, job_id)
+        if job is None or job.status != QUEUED:
+            return
+
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        db.commit()
+
+        try:
+            s = ShiftAss(
+                job.start_date.isoformat(), job.end_date.isoformat(), store_id=job.store_id
+            )
+            df = s.run(job.options)
+
+            # キャンセルされていたら保存しない
+            if _job_status(db, job_id) == CANCELLED:
+                return
+
+            saved = s.save_schedule(df)
+            job = db.get(ShiftJob, job_id)
+            job.result = _jsonable(saved) if isinstance(saved, list) else []
+            job.status = DONE
+        except Exception as e:
+            db.rollback()
+            job = db.get(ShiftJob, job_id)
+            job.status = FAILED
+            job.error = str(e)
+        job.finished_at = datetime.now()
+        db.commit()
+
+
+# =========================================================
+# WEB SIDE
+# =========================================================
+class ShiftJobService:
+    """Submit / poll / cancel schedule generation running in a process pool.
+
+    Job state lives in the ``shift_jobs`` table, so any web worker can
+    answer a poll for a job submitted through another one.
+    """
+
+    _executor = None
+    _futures = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=SHIFT_JOB_WORKERS,
+                    mp_context=multiprocessing.get_context(SHIFT_JOB_START_METHOD),
+                    initializer=_init_worker,
+                )
+            return cls._executor
+
+    @staticmethod
+    def _parse_date(value, field):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{field} must be YYYY-MM-DD") from e
+
+    @classmethod
+    def submit(cls, data: dict):
+        start = cls._parse_date(data.get("start_date"), "start_date")
+        end = cls._parse_date(data.get("end_date"), "end_date")
+        if start > end:
+            raise ValueError("start_date must not be after end_date")
+        options = SolverSettings.parse_overrides(data.get("solver"))
+
+        with SessionLocal() as db:
+            job = ShiftJob(
+                id=uuid.uuid4().hex,
+                status=QUEUED,
+                start_date=start,
+                end_date=end,
+                store_id=data.get("store_id"),
+                options=options or None,
+                created_at=datetime.now(),
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+
+        future = cls.executor().submit(run_shift_job, job.id)
+        with cls._lock:
+            cls._futures[job.id] = future
+        future.add_done_callback(lambda f, job_id=job.id: cls._forget(job_id))
+        return job
+
+    @classmethod
+    def _forget(cls, job_id):
+        with cls._lock:
+            cls._futures.pop(job_id, None)
+
+    @staticmethod
+    def get_job(job_id):
+        # polled often: close the session right away
+        with SessionLocal() as db:
+            return db.get(ShiftJob, job_id)
+
+    @classmethod
+    def cancel(cls, job_id):
+        with SessionLocal() as db:
+            job = db.get(ShiftJob, job_id)
+            if job is None or job.status in FINISHED:
+                return job
+
+            with cls._lock:
+                future = cls._futures.get(job_id)
+            if future is not None:
+                # still waiting in this worker's queue: never starts
+                future.cancel()
+
+            # a running solve finishes but its result is not saved
+            job.status = CANCELLED
+            job.finished_at = datetime.now()
+            db.commit()
+            db.refresh(job)
+            return job
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
-from ..models.shift_pref_model import ShiftPre
+from ..models.shift_pref_model import ShiftPre, CLOSING_TIME
 from ..utils.db import get_db
+from ..utils.pagination import paginate
+from .shift_dirty_days import DirtyDays
+from .resource_versions import ResourceVersions, SHIFT_PRE
 from datetime import datetime
 
 
@@ -16,6 +19,13 @@ class ShiftPreferences:
     def change_time(time_str: str):
         return datetime.strptime(time_str, '%H:%M').time()
 
+    @classmethod
+    def change_end_time(cls, time_str: str):
+        # 閉店まで: "24:00" (または翌日の "00:00")
+        if time_str in ("24:00", "00:00"):
+            return CLOSING_TIME
+        return cls.change_time(time_str)
+
     def save_to_shiftPre_db(self):
         if not self.data:
             raise ValueError("No data provided")
@@ -27,7 +37,7 @@ class ShiftPreferences:
                 staff_id=self.data["staff_id"],
                 date=self.change_date(self.data["date"]),
                 start_time=self.change_time(self.data["start_time"]),
-                end_time=self.change_time(self.data["end_time"])
+                end_time=self.change_end_time(self.data["end_time"])
             )
 
             
@@ -35,6 +45,9 @@ class ShiftPreferences:
                 raise ValueError("start_time must be before end_time")
             
             db.add(new_shift)
+            # この日のシフトは作り直しが必要
+            DirtyDays.mark(db, [new_shift.date], "shift_pre")
+            ResourceVersions.bump(db, SHIFT_PRE)
             db.commit()
             db.refresh(new_shift)
 
@@ -46,6 +59,25 @@ class ShiftPreferences:
 
 
     @staticmethod
-    def get_shift_pre():
+    def query_shift_pre(db, start=None, end=None, staff_id=None):
+        """Preferences filtered in SQL (every filter is optional)."""
+        q = db.query(ShiftPre)
+        if start is not None:
+            q = q.filter(ShiftPre.date >= start)
+        if end is not None:
+            q = q.filter(ShiftPre.date <= end)
+        if staff_id is not None:
+            q = q.filter(ShiftPre.staff_id == staff_id)
+        return q
+
+    @staticmethod
+    def get_shift_pre(start=None, end=None, staff_id=None):
+        db: Session = next(get_db())
+        return ShiftPreferences.query_shift_pre(db, start, end, staff_id).all()
+
+    @staticmethod
+    def page_shift_pre(start=None, end=None, staff_id=None, cursor=None, limit=None):
+        """(rows, next_cursor) in (date, shift_id) order."""
         db: Session = next(get_db())
-        return db.query(ShiftPre).all()
\ No newline at end of file
+        q = ShiftPreferences.query_shift_pre(db, start, end, staff_id)
+        return paginate(q, [ShiftPre.date, ShiftPre.shift_id], cursor, limit)
\ No newline at end of file
@@ -0,0 +1,447 @@
+import numpy as np
+import pandas as pd
+
+from ortools.sat.python import cp_model
+
+from back_end.services.shift_tables import HOUR_START, HOURS
+from back_end.config.config import (
+    SOLVER_TIME_TIERS, SOLVER_NUM_WORKERS, SOLVER_RELATIVE_GAP, SOLVER_RANDOM_SEED,
+    SHIFT_SOLVE_MODE, SOLVER_SYMMETRY_BREAKING,
+)
+
+
+# staff_status の整数コード
+STATUS_OTHER = 0
+STATUS_INTERNATIONAL = 1
+STATUS_HIGH_SCHOOL = 2
+
+STATUS_CODES = {
+    "international": STATUS_INTERNATIONAL,
+    "high_school": STATUS_HIGH_SCHOOL,
+}
+
+SALES_PER_STAFF = 5000      # 5000円に1人
+SENIOR_LEVELS = (3, 4, 5)
+WEEKLY_HOUR_CAP = 28        # 留学生の週上限
+MAX_CONSECUTIVE = 5         # 6時間連続勤務は禁止
+LONG_SHIFT_HOURS = 6        # これを超えたら休憩1回以上
+MAX_BREAKS = 3
+SHORTAGE_COST = 1000        # 不足1人・1時間あたり
+NO_SENIOR_COST = 1000       # 責任者がいない1時間あたり
+
+# "full": 1つのモデル / "decomposed": 日ごとに分割して並列 / "auto": 期間で切替
+SOLVE_MODES = ("auto", "full", "decomposed")
+
+
+def _group(keys, n_groups):
+    """Positions of `keys` grouped by value: list of index arrays, one per group."""
+    order = np.argsort(keys, kind="stable")
+    counts = np.bincount(keys, minlength=n_groups)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+class SolverSettings:
+    """CP-SAT parameters; defaults come from config and scale with problem size."""
+
+    FIELDS = {
+        "max_time_in_seconds": float,
+        "num_search_workers": int,
+        "relative_gap_limit": float,
+        "random_seed": int,
+    }
+
+    def __init__(self, max_time_in_seconds, num_search_workers=SOLVER_NUM_WORKERS,
+                 relative_gap_limit=SOLVER_RELATIVE_GAP, random_seed=SOLVER_RANDOM_SEED,
+                 mode=SHIFT_SOLVE_MODE):
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.relative_gap_limit = relative_gap_limit
+        self.random_seed = random_seed
+        self.mode = mode
+
+    @staticmethod
+    def time_limit_for(n_vars):
+        for max_vars, seconds in SOLVER_TIME_TIERS:
+            if max_vars is None or n_vars <= max_vars:
+                return seconds
+        return SOLVER_TIME_TIERS[-1][1]
+
+    @classmethod
+    def parse_overrides(cls, overrides):
+        """Validate a per-request options dict; raises ValueError."""
+        if overrides is None:
+            return {}
+        if not isinstance(overrides, dict):
+            raise ValueError("solver options must be an object")
+        parsed = {}
+        for key, value in overrides.items():
+            if key == "mode":
+                if value not in SOLVE_MODES:
+                    raise ValueError(f"mode must be one of {', '.join(SOLVE_MODES)}")
+                parsed[key] = value
+                continue
+            if key not in cls.FIELDS:
+                raise ValueError(f"unknown solver option: {key}")
+            try:
+                value = cls.FIELDS[key](value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"invalid value for {key}: {value!r}") from e
+            if value < 0:
+                raise ValueError(f"{key} must not be negative")
+            parsed[key] = value
+        return parsed
+
+    @classmethod
+    def for_problem(cls, problem, overrides=None):
+        """Size-based defaults, then any per-request overrides (dict)."""
+        settings = cls(cls.time_limit_for(problem.n_vars))
+        for key, value in cls.parse_overrides(overrides).items():
+            setattr(settings, key, value)
+        return settings
+
+    def apply(self, solver):
+        params = solver.parameters
+        params.max_time_in_seconds = self.max_time_in_seconds
+        # num_search_workers is the old name of num_workers
+        params.num_workers = self.num_search_workers
+        params.relative_gap_limit = self.relative_gap_limit
+        params.random_seed = self.random_seed
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in (*self.FIELDS, "mode")}
+
+
+class ShiftProblem:
+    """Dense array form of one scheduling horizon.
+
+    Staff, days and hours are integer axes. ``var_index[s, d, h]`` is the
+    position of the decision variable for that cell, or -1 when the staff
+    member is not available, so every constraint is generated from index
+    lookups instead of DataFrame iteration.
+    """
+
+    def __init__(self, staff_ids, staff_level, staff_status, dates, demand, available):
+        self.staff_ids = staff_ids          # (S,)
+        self.staff_level = staff_level      # (S,)
+        self.staff_status = staff_status    # (S,) STATUS_* codes
+        self.dates = dates                  # (D,) datetime64[D]
+        self.hours = HOURS                  # (H,)
+        self.demand = demand                # (D, H) required people
+        self.available = available          # (S, D, H) bool
+
+        # 変数番号は (staff, day, hour) の順
+        self.var_index = np.full(available.shape, -1, dtype=np.int64)
+        self.var_index[available] = np.arange(int(available.sum()))
+        self.var_s, self.var_d, self.var_h = np.nonzero(available)
+
+    @property
+    def n_staff(self):
+        return len(self.staff_ids)
+
+    @property
+    def n_days(self):
+        return len(self.dates)
+
+    @property
+    def n_hours(self):
+        return len(self.hours)
+
+    @property
+    def n_vars(self):
+        return len(self.var_s)
+
+    @property
+    def is_senior(self):
+        # 責任者として数える人 (L3以上)
+        return np.isin(self.staff_level, SENIOR_LEVELS)
+
+    def week_of_day(self):
+        # 開始日から7日ごとに1週 (dates は希望のある日だけなので暦日で数える)
+        if self.n_days == 0:
+            return np.zeros(0, dtype=np.int64)
+        return (self.dates - self.dates[0]).astype("timedelta64[D]").astype(np.int64) // 7
+
+    def shortage(self, grid):
+        """(D, H) people missing per slot and (D, H) bool "no senior" for a 0/1 grid."""
+        missing = np.maximum(self.demand - grid.sum(axis=0), 0)
+        no_senior = (grid[self.is_senior].sum(axis=0) == 0) & (self.demand > 0)
+        return missing, no_senior
+
+    def subset_days(self, day_indices):
+        """Same staff axis, only the given days (used by the per-day solver)."""
+        day_indices = np.asarray(day_indices)
+        return ShiftProblem(
+            self.staff_ids, self.staff_level, self.staff_status,
+            self.dates[day_indices], self.demand[day_indices],
+            self.available[:, day_indices],
+        )
+
+    @classmethod
+    def from_frame(cls, df, slots=None):
+        """Build from ``ShiftAss.combine_data()`` (one row per staff x date x hour).
+
+        Demand comes from `slots` (date, hour, pred_sale_per_hour) when given,
+        so hours nobody can work still count as short; otherwise from `df`.
+        """
+        staff_ids, s_idx = np.unique(df["id"].to_numpy(), return_inverse=True)
+        day_values = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        dates, d_idx = np.unique(day_values, return_inverse=True)
+        h_idx = df["hour"].to_numpy().astype(np.int64) - HOUR_START
+
+        first = np.unique(s_idx, return_index=True)[1]
+        staff_level = df["level"].to_numpy()[first].astype(np.int64)
+        staff_status = np.array(
+            [STATUS_CODES.get(c, STATUS_OTHER) for c in df["status_code"].to_numpy()[first]],
+            dtype=np.int8,
+        )
+
+        S, D, H = len(staff_ids), len(dates), len(HOURS)
+        available = np.zeros((S, D, H), dtype=bool)
+        available[s_idx, d_idx, h_idx] = True
+
+        demand = np.zeros((D, H), dtype=np.int64)
+        if slots is None:
+            slot_d, slot_h, sales = d_idx, h_idx, df["pred_sale_per_hour"].to_numpy()
+        else:
+            slot_days = pd.to_datetime(slots["date"]).to_numpy().astype("datetime64[D]")
+            # 希望シフトのある日だけ
+            slot_d = np.searchsorted(dates, slot_days)
+            keep = slot_d < D
+            keep[keep] = dates[slot_d[keep]] == slot_days[keep]
+            slot_d = slot_d[keep]
+            slot_h = slots["hour"].to_numpy().astype(np.int64)[keep] - HOUR_START
+            sales = slots["pred_sale_per_hour"].to_numpy()[keep]
+        demand[slot_d, slot_h] = np.maximum(1, (sales // SALES_PER_STAFF).astype(np.int64))
+
+        return cls(staff_ids, staff_level, staff_status, dates, demand, available)
+
+
+class ShiftModel:
+    """CP-SAT model for a ShiftProblem; ``x[k]`` is the variable of cell k.
+
+    Every slot someone can work has an integer ``short`` variable (people
+    missing) and a bool ``no_senior``, so an understaffed week still has a
+    solution and the solution says where it is short.
+
+    With ``symmetry=True`` staff who are interchangeable on a day (same
+    available hours, seniority and cap) get their rows for that day ordered
+    lexicographically, so the solver does not explore their permutations.
+    """
+
+    def __init__(self, problem, weekly_cap=WEEKLY_HOUR_CAP, caps=None,
+                 symmetry=SOLVER_SYMMETRY_BREAKING):
+        self.problem = problem
+        self.weekly_cap = weekly_cap
+        # (S, n_weeks) の上限で weekly_cap を置き換える (日ごとに配分した予算など)
+        self.caps = caps
+        self.model = cp_model.CpModel()
+        self.x = [self.model.NewBoolVar(f"work_{k}") for k in range(problem.n_vars)]
+        self.short = []
+        self.no_senior = []
+        # (day, staff indices, hours) of every class with 2+ members
+        self.classes = self.staff_classes() if symmetry else []
+
+        self.add_coverage()
+        self.add_weekly_caps()
+        self.add_daily_rules()
+        self.add_symmetry_breaking()
+        self.set_objective()
+
+    # =========================================================
+    # SYMMETRY
+    # =========================================================
+    def staff_classes(self):
+        """Groups of staff that can swap their rows of one day.
+
+        Only the weekly cap links days, so for uncapped staff a swap of one
+        day's rows keeps every constraint and the cost. Capped staff are
+        grouped only in one-day problems (the decomposed solver), where
+        their remaining hours are part of the key.
+        """
+        p = self.problem
+        capped = p.staff_status == STATUS_INTERNATIONAL
+        eligible = ~capped if p.n_days > 1 else np.ones(p.n_staff, dtype=bool)
+        cap = np.full(p.n_staff, self.weekly_cap) if self.caps is None else self.caps[:, 0]
+        cap = np.where(capped, cap, 0)
+        bits = 1 << np.arange(p.n_hours, dtype=np.int64)
+
+        classes = []
+        for d in range(p.n_days):
+            pattern = p.available[:, d].astype(np.int64) @ bits
+            members = np.nonzero(eligible & (pattern > 0))[0]
+            if len(members) < 2:
+                continue
+            keys = np.column_stack([
+                pattern[members], p.is_senior[members], capped[members], cap[members],
+            ])
+            _, inverse = np.unique(keys, axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+            for group in _group(inverse, int(inverse.max()) + 1):
+                if len(group) > 1:
+                    staff = members[group]
+                    classes.append((d, staff, np.nonzero(p.available[staff[0], d])[0]))
+        return classes
+
+    @staticmethod
+    def _lex_weights(n):
+        # 早い時間ほど大きい重み: 重み付き和の大小 = 0/1 列の辞書順
+        return (1 << np.arange(n - 1, -1, -1, dtype=np.int64)).tolist()
+
+    def add_symmetry_breaking(self):
+        p = self.problem
+        for d, staff, hours in self.classes:
+            weights = self._lex_weights(len(hours))
+            rows = [
+                cp_model.LinearExpr.WeightedSum([self.x[k] for k in p.var_index[s, d, hours]], weights)
+                for s in staff
+            ]
+            for first, second in zip(rows, rows[1:]):
+                self.model.Add(first >= second)
+
+    # =========================================================
+    # CONSTRAINTS
+    # =========================================================
+    def add_coverage(self):
+        p = self.problem
+        is_senior = p.is_senior
+        slots = _group(p.var_d * p.n_hours + p.var_h, p.n_days * p.n_hours)
+
+        for slot, ks in enumerate(slots):
+            if len(ks) == 0:
+                # 誰も入れない枠は全員分が不足 (ShiftProblem.shortage で集計)
+                continue
+            d, h = divmod(slot, p.n_hours)
+            slot_vars = [self.x[k] for k in ks]
+            # 1. 必要人数の確保 (足りない分は short)
+            need = int(p.demand[d, h])
+            short = self.model.NewIntVar(0, need, f"short_{d}_{h}")
+            self.model.Add(cp_model.LinearExpr.Sum(slot_vars) + short == need)
+
+            # 2. 責任者 (L3以上) が1人以上 (いなければ no_senior)
+            senior = [self.x[k] for k in ks if is_senior[p.var_s[k]]]
+            no_senior = self.model.NewBoolVar(f"no_senior_{d}_{h}")
+            self.model.Add(cp_model.LinearExpr.Sum(senior) + no_senior >= 1)
+
+            self.short.append(short)
+            self.no_senior.append(no_senior)
+
+    def add_weekly_caps(self):
+        p = self.problem
+        if p.n_vars == 0:
+            return
+        n_weeks = int(p.week_of_day().max()) + 1
+        capped = np.nonzero(p.staff_status[p.var_s] == STATUS_INTERNATIONAL)[0]
+        keys = p.var_s[capped] * n_weeks + p.week_of_day()[p.var_d[capped]]
+
+        # 留学生: 週ごとの合計時間に上限
+        for key, ks in enumerate(_group(keys, p.n_staff * n_weeks)):
+            if len(ks) == 0:
+                continue
+            s, week = divmod(key, n_weeks)
+            week_vars = [self.x[k] for k in capped[ks]]
+            self.model.Add(cp_model.LinearExpr.Sum(week_vars) <= self.cap_for(s, week))
+
+    def cap_for(self, s, week):
+        if self.caps is not None:
+            return int(self.caps[s, week])
+        return self.weekly_cap
+
+    def add_daily_rules(self):
+        p = self.problem
+        m = self.model
+        for key, ks in enumerate(_group(p.var_s * p.n_days + p.var_d, p.n_staff * p.n_days)):
+            if len(ks) == 0:
+                continue
+            s, d = divmod(key, p.n_days)
+
+            row = p.var_index[s, d]            # (H,) この日のこの人の変数番号
+            w = {h: self.x[row[h]] for h in np.nonzero(row >= 0)[0]}
+
+            # 上がった後 (done) は同じ日にもう入らない
+            done = {h: m.NewBoolVar(f"done_{s}_{d}_{h}") for h in w}
+            for h in w:
+                m.AddImplication(done[h], w[h].Not())
+                if h - 1 in w:
+                    m.AddImplication(done[h - 1], done[h])
+
+            # 休憩 = 1 -> 0 -> 1 (休憩は1時間だけ、2時間空いたらその日は終わり)
+            break_starts = []
+            for h in w:
+                if h - 1 in w and h + 1 in w:
+                    m.AddBoolOr([w[h - 1].Not(), w[h], w[h + 1], done[h + 1]])
+                    is_brk = m.NewBoolVar(f"brk_{s}_{d}_{h}")
+                    # 直前が1・今が0・次が1 のときだけ is_brk=1 (節で表現)
+                    m.AddBoolOr([w[h - 1].Not(), w[h], w[h + 1].Not(), is_brk])
+                    m.AddImplication(is_brk, w[h - 1])
+                    m.AddImplication(is_brk, w[h].Not())
+                    m.AddImplication(is_brk, w[h + 1])
+                    break_starts.append(is_brk)
+
+                # 6時間連続勤務を禁止
+                window = [w[h + i] for i in range(MAX_CONSECUTIVE + 1) if h + i in w]
+                if len(window) == MAX_CONSECUTIVE + 1:
+                    m.Add(cp_model.LinearExpr.Sum(window) <= MAX_CONSECUTIVE)
+
+            if break_starts:
+                m.Add(cp_model.LinearExpr.Sum(break_starts) <= MAX_BREAKS)
+
+            # 6時間超えの勤務なら最低1回は休憩
+            total = cp_model.LinearExpr.Sum(list(w.values()))
+            has_long_shift = m.NewBoolVar(f"long_{s}_{d}")
+            m.Add(total > LONG_SHIFT_HOURS).OnlyEnforceIf(has_long_shift)
+            m.Add(total <= LONG_SHIFT_HOURS).OnlyEnforceIf(has_long_shift.Not())
+            if break_starts:
+                m.Add(cp_model.LinearExpr.Sum(break_starts) >= 1).OnlyEnforceIf(has_long_shift)
+
+    def set_objective(self):
+        cost = (
+            [1] * len(self.x)
+            + [SHORTAGE_COST] * len(self.short)
+            + [NO_SENIOR_COST] * len(self.no_senior)
+        )
+        self.model.Minimize(
+            cp_model.LinearExpr.WeightedSum(self.x + self.short + self.no_senior, cost)
+        )
+
+    # =========================================================
+    # SOLVE / RESULT
+    # =========================================================
+    def add_hints(self, hint):
+        """Warm start from a (S, D, H) 0/1 array, e.g. last week's schedule."""
+        p = self.problem
+        hint = self.canonical(hint)
+        values = hint[p.var_s, p.var_d, p.var_h]
+        for k in range(p.n_vars):
+            self.model.AddHint(self.x[k], int(values[k]))
+
+    def canonical(self, grid):
+        """`grid` with each class's rows sorted to satisfy the ordering."""
+        if not self.classes:
+            return grid
+        grid = grid.copy()
+        for d, staff, hours in self.classes:
+            rows = grid[staff, d][:, hours].astype(np.int64)
+            order = np.argsort(-(rows @ np.array(self._lex_weights(len(hours)))), kind="stable")
+            grid[staff, d] = grid[staff[order], d]
+        return grid
+
+    def solve(self, settings=None):
+        solver = cp_model.CpSolver()
+        (settings or SolverSettings.for_problem(self.problem)).apply(solver)
+        status = solver.Solve(self.model)
+        return solver, status
+
+    def assigned(self, solver):
+        """Variable positions set to 1 in the solution."""
+        values = np.fromiter(
+            (solver.Value(v) for v in self.x), dtype=np.int8, count=len(self.x)
+        )
+        return np.nonzero(values)[0]
+
+    def solution(self, solver):
+        """(S, D, H) 0/1 array of the solution."""
+        p = self.problem
+        grid = np.zeros(p.available.shape, dtype=np.int8)
+        ks = self.assigned(solver)
+        grid[p.var_s[ks], p.var_d[ks], p.var_h[ks]] = 1
+        return grid
@@ -0,0 +1,128 @@
+import json
+import os
+
+import numpy as np
+
+
+# 営業時間スロット: 9時〜24時 (h = h:00-h+1:00, 最後は 23:00-24:00)
+HOUR_START = 9
+HOUR_END = 24       # 閉店時刻 (この時刻から始まる枠はない)
+HOURS = np.arange(HOUR_START, HOUR_END)
+
+# ステータス表記ゆれを正規化 (DB / フロント / テストデータで異なる)
+STATUS_ALIASES = {
+    "international": "international",
+    "international-student": "international",
+    "international_student": "international",
+    "留学生": "international",
+    "high-school": "high_school",
+    "high_school": "high_school",
+    "高校生": "high_school",
+}
+
+# ステータスごとの勤務可能時間 [start, end)
+STATUS_HOUR_LIMITS = {
+    "high_school": (HOUR_START, 22),
+}
+
+
+def normalize_status(status):
+    if not isinstance(status, str):
+        return "unknown"
+    return STATUS_ALIASES.get(status.strip().lower(), status)
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class HourlyDemandTable:
+    """Share of a day's predicted sales that falls in each hour.
+
+    Stored as a (7, 25) array indexed by [weekday, hour] so a whole
+    schedule frame is converted with one fancy-indexing lookup.
+    """
+
+    # hours not listed use DEFAULT_RATIO
+    DEFAULT_RATIO = 0.09
+    DEFAULT_RATIOS = {
+        9: 0.052, 10: 0.052,
+        12: 0.1, 13: 0.1, 14: 0.1, 15: 0.1,
+        16: 0.07, 17: 0.07,
+        18: 0.08, 19: 0.08, 20: 0.08, 23: 0.08,
+    }
+
+    def __init__(self, ratios=None, by_weekday=None, default_ratio=None):
+        base = self._to_array(
+            self.DEFAULT_RATIOS if ratios is None else ratios,
+            self.DEFAULT_RATIO if default_ratio is None else default_ratio,
+        )
+        self.matrix = np.tile(base, (7, 1))
+        for weekday, hourly in (by_weekday or {}).items():
+            row = WEEKDAYS.index(weekday) if isinstance(weekday, str) else int(weekday)
+            self.matrix[row] = base
+            for hour, ratio in hourly.items():
+                self.matrix[row, int(hour)] = float(ratio)
+
+    @staticmethod
+    def _to_array(ratios, default_ratio):
+        arr = np.full(HOUR_END + 1, float(default_ratio))
+        for hour, ratio in ratios.items():
+            arr[int(hour)] = float(ratio)
+        return arr
+
+    def ratio(self, hours, weekdays=0):
+        return self.matrix[np.asarray(weekdays), np.asarray(hours)]
+
+    def sales_per_hour(self, hours, sales, weekdays=0):
+        """hours / weekdays (0 = Monday) / sales broadcast element-wise."""
+        return np.asarray(sales, dtype=float) * self.ratio(hours, weekdays)
+
+
+class WageTable:
+    """Hourly wage indexed by staff level (levels above the table clip to the top band)."""
+
+    # index = level; level 0 (unknown) is paid the top band like the old else branch
+    DEFAULT_WAGES = [1500, 1200, 1200, 1250, 1400, 1500]
+
+    def __init__(self, wages=None):
+        self.wages = np.asarray(
+            self.DEFAULT_WAGES if wages is None else wages, dtype=np.int64
+        )
+
+    def lookup(self, levels):
+        idx = np.clip(np.asarray(levels, dtype=np.int64), 0, len(self.wages) - 1)
+        return self.wages[idx]
+
+
+# =========================================================
+# PER-STORE OVERRIDES
+# =========================================================
+# SHIFT_TABLES_FILE may point to JSON such as
+# {"stores": {"2": {"demand": {"ratios": {...}, "by_weekday": {"Saturday": {...}}},
+#                   "wages": [1500, 1250, 1250, 1300, 1450, 1550]}}}
+_tables_cache = {}
+
+
+def _store_config(store_id):
+    path = os.environ.get("SHIFT_TABLES_FILE")
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("stores", {}).get(str(store_id), {})
+
+
+def tables_for_store(store_id=None):
+    """(HourlyDemandTable, WageTable) for a store, cached per process."""
+    if store_id not in _tables_cache:
+        cfg = _store_config(store_id) if store_id is not None else {}
+        demand = cfg.get("demand", {})
+        _tables_cache[store_id] = (
+            HourlyDemandTable(
+                ratios=demand.get("ratios"),
+                by_weekday=demand.get("by_weekday"),
+                default_ratio=demand.get("default_ratio"),
+            ),
+            WageTable(cfg.get("wages")),
+        )
+    return _tables_cache[store_id]
@@ -0,0 +1,92 @@
+import bisect
+import threading
+import time
+
+from ..models.staff_model import Staff
+from ..utils.db import get_db
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..config.config import STAFF_CACHE_CHECK_SECONDS
+from .resource_versions import ResourceVersions, STAFF
+
+
+class StaffDirectory:
+    """Per-process copy of the staff table as ``{id: staff dict}``.
+
+    ``StaffService`` writes call ``invalidate`` in this process. Writes
+    made by other workers are picked up through the shared ``staff``
+    resource version, checked at most every STAFF_CACHE_CHECK_SECONDS.
+    The (version, entries, ids) triple is replaced in one assignment so
+    readers never see a half-built directory.
+    """
+
+    def __init__(self, check_seconds=STAFF_CACHE_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._entry = None          # (version, {id: dict}, sorted ids)
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._entry = None
+
+    @staticmethod
+    def _load(db):
+        # routes serialize these dicts as-is: only Staff.to_dict() fields here
+        # (pay stays in the scheduler's WageTable)
+        return {s.id: s.to_dict() for s in db.query(Staff).all()}
+
+    def _current(self):
+        entry = self._entry
+        now = time.monotonic()
+        if entry is not None and now - self._checked_at < self.check_seconds:
+            return entry
+
+        with self._lock:
+            db = next(get_db())
+            version = ResourceVersions.current(db, [STAFF])[STAFF]
+            entry = self._entry
+            if entry is None or entry[0] != version:
+                entries = self._load(db)
+                entry = (version, entries, sorted(entries))
+                self._entry = entry
+            self._checked_at = time.monotonic()
+            return entry
+
+    # =========================================================
+    # READS
+    # =========================================================
+    def all(self):
+        """{id: staff dict} (do not modify)."""
+        return self._current()[1]
+
+    def get(self, staff_id):
+        return self._current()[1].get(staff_id)
+
+    def many(self, ids):
+        entries = self.all()
+        return [entries[i] for i in ids if i in entries]
+
+    def page(self, status=None, level=None, cursor=None, limit=None):
+        """(dicts, next_cursor) in id order; same cursor format as the SQL pages.
+
+        ``limit=None`` returns every match.
+        """
+        _, entries, ids = self._current()
+        start = 0
+        if cursor is not None:
+            after = decode_cursor(cursor, [Staff.id])[0]
+            start = bisect.bisect_right(ids, after)
+
+        rows = []
+        for staff_id in ids[start:]:
+            d = entries[staff_id]
+            if status is not None and d["status"] != status:
+                continue
+            if level is not None and d["level"] != level:
+                continue
+            if len(rows) == limit:
+                return rows, encode_cursor([rows[-1]["id"]])
+            rows.append(d)
+        return rows, None
+
+
+staff_directory = StaffDirectory()
@@ -2,6 +2,12 @@ from sqlalchemy.orm import Session
 from ..models.staff_model import Staff
 from ..models.shift_pref_model import ShiftPre
 from ..utils.db import get_db
+from .shift_dirty_days import DirtyDays
+from .resource_versions import ResourceVersions, STAFF, SHIFT_PRE, SHIFTS
+from .staff_directory import staff_directory
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class StaffService:
 
@@ -12,21 +18,34 @@ class StaffService:
         "full_time" : "フリーター",
         "part_time" : "パートタイム"
     }
+
+    # シフト計算に使う項目 (変わったら今日以降の担当日を作り直す)
+    schedule_fields = ("level", "status")
     #take all staff data from database for using dashboard or something like that
     
     @staticmethod
-    def get_all_staff():
+    def get_all_staff(ids=None):
         db: Session = next(get_db())
-        
-        
-        
-        return db.query(Staff).all()
+        q = db.query(Staff)
+        if ids is not None:
+            q = q.filter(Staff.id.in_([int(i) for i in ids]))
+        return q.all()
+
+    @staticmethod
+    def page_staff(status=None, level=None, cursor=None, limit=None):
+        """(staff dicts, next_cursor) in id order, from the in-memory directory."""
+        return staff_directory.page(status, level, cursor, limit)
     #take one person frome database like searching with staff id 
     
     @staticmethod
     def get_staff_by_id(staff_id: int):
         db: Session = next(get_db())
         return db.query(Staff).filter(Staff.id == staff_id).first()
+
+    @staticmethod
+    def get_staff_info(staff_id: int):
+        """Staff dict from the directory (None if unknown)."""
+        return staff_directory.get(staff_id)
     
     #create staff data 
     @staticmethod
@@ -44,7 +63,9 @@ class StaffService:
 
 
         db.add(new_staff)
+        ResourceVersions.bump(db, STAFF)
         db.commit()
+        staff_directory.invalidate()
         db.refresh(new_staff)
         return new_staff
 
@@ -52,16 +73,26 @@ class StaffService:
     def update_staff(staff_id: int, data: dict):
         db: Session = next(get_db())
         staff = db.query(Staff).filter(Staff.id == staff_id).first()
-        print("PATCH data:", data)
-        print("RAW status:", data.get("status"))
-        print("status_map keys:", StaffService.status_map.keys())
+        logger.debug("PATCH staff %s: %s", staff_id, data)
+        if not staff:
+            return None
+
+        changed = [
+            key for key in StaffService.schedule_fields
+            if key in data and getattr(staff, key) != data[key]
+        ]
 
         for key, value in data.items():
             if hasattr(staff, key):
                 setattr(staff, key, value)
-                print(f"Updating field {key} to {value}")
+                logger.debug("Updating field %s to %s", key, value)
+
+        if changed:
+            DirtyDays.mark(db, DirtyDays.staff_dates(db, staff_id), "staff_update")
+        ResourceVersions.bump(db, STAFF)
 
         db.commit()
+        staff_directory.invalidate()
         db.refresh(staff)
         return staff
 
@@ -73,11 +104,17 @@ class StaffService:
         
         if not staff:
             return None
+
+        # 削除前に担当していた日 (希望 / 確定シフト) を控えておく
+        DirtyDays.mark(db, DirtyDays.staff_dates(db, staff_id), "staff_delete")
         
         for sp in shift_pre:
             db.delete(sp)
         
         db.delete(staff)
+        # 希望シフトと確定シフトのブロックも一緒に消える
+        ResourceVersions.bump(db, STAFF, SHIFT_PRE, SHIFTS)
         
         db.commit()
+        staff_directory.invalidate()
         return True
@@ -0,0 +1,181 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..models.weather_model import WeatherDaily
+from ..utils.db import get_db
+
+from datetime import datetime
+import threading
+import pandas as pd
+import requests
+from openmeteo_requests import Client
+from retry_requests import retry
+
+
+class WeatherStore:
+    """Daily weather rows persisted per (latitude, longitude, date).
+
+    Only dates that are missing (or whose stored value is still a forecast
+    fetched on an earlier day) are requested from Open-Meteo, as one range
+    call through a shared, pooled HTTP session.  Pass ``client`` to use a
+    stub that implements ``weather_api(url, params=...)``.
+    """
+
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    DAILY_VARIABLES = [
+        "rain_sum",
+        "snowfall_sum",
+        "weather_code",
+        "temperature_2m_max",
+    ]
+
+    _shared_client = None
+    _client_lock = threading.Lock()
+
+    def __init__(self, latitude, longitude, timezone="Asia/Tokyo", client=None):
+        # float PK: round so that 35.6895 and 35.68950001 hit the same rows
+        self.latitude = round(float(latitude), 4)
+        self.longitude = round(float(longitude), 4)
+        self.timezone = timezone
+        self.client = client or self.default_client()
+
+    @classmethod
+    def default_client(cls):
+        with cls._client_lock:
+            if cls._shared_client is None:
+                session = retry(requests.Session(), retries=5, backoff_factor=0.2)
+                cls._shared_client = Client(session=session)
+            return cls._shared_client
+
+    # =========================================================
+    # STORE
+    # =========================================================
+    def _stored_rows(self, db, start, end):
+        return (
+            db.query(WeatherDaily)
+            .filter(
+                WeatherDaily.latitude == self.latitude,
+                WeatherDaily.longitude == self.longitude,
+                WeatherDaily.date.between(start, end),
+            )
+            .all()
+        )
+
+    @staticmethod
+    def _is_final(row, today):
+        # observed values (fetched after the day ended) never change;
+        # forecasts are good for the day they were fetched on
+        fetched_day = row.fetched_at.date()
+        return row.date < fetched_day or fetched_day >= today
+
+    def missing_dates(self, start, end, today=None, rows=None):
+        """Dates in [start, end] that have no usable stored row."""
+        today = today or datetime.now().date()
+        if rows is None:
+            db: Session = next(get_db())
+            rows = self._stored_rows(db, start, end)
+
+        fresh = {r.date for r in rows if self._is_final(r, today)}
+        days = pd.date_range(start, end).date
+        return [d for d in days if d not in fresh]
+
+    def _save(self, db, df, fetched_at):
+        if df.empty:
+            return
+        # replace stale forecasts for exactly the fetched days
+        db.query(WeatherDaily).filter(
+            WeatherDaily.latitude == self.latitude,
+            WeatherDaily.longitude == self.longitude,
+            WeatherDaily.date.in_(list(df["date"])),
+        ).delete(synchronize_session=False)
+
+        # days beyond the forecast horizon come back as NaN; they are stored
+        # as NULL so they are not re-requested again the same day
+        def value(v, cast):
+            return None if pd.isna(v) else cast(v)
+
+        db.add_all([
+            WeatherDaily(
+                latitude=self.latitude,
+                longitude=self.longitude,
+                date=row.date,
+                rain=value(row.rain, float),
+                snowfall=value(row.snowfall, float),
+                weather_code=value(row.weather_code, int),
+                temperature=value(row.temperature, float),
+                fetched_at=fetched_at,
+            )
+            for row in df.itertuples(index=False)
+        ])
+        try:
+            db.commit()
+        except IntegrityError:
+            # another worker stored the same span concurrently
+            db.rollback()
+
+    # =========================================================
+    # OPEN-METEO
+    # =========================================================
+    def fetch(self, start, end):
+        """Request daily weather for [start, end] in a single API call."""
+        params = {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "daily": self.DAILY_VARIABLES,
+            "timezone": self.timezone,
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": end.strftime("%Y-%m-%d"),
+        }
+        responses = self.client.weather_api(self.FORECAST_URL, params=params)
+        if not responses:
+            return pd.DataFrame(
+                columns=["date", "rain", "snowfall", "weather_code", "temperature"]
+            )
+
+        response = responses[0]
+        daily = response.Daily()
+        # Time() is local midnight as a unix timestamp; shift by the UTC
+        # offset so the label is the local calendar date
+        offset = pd.Timedelta(seconds=response.UtcOffsetSeconds())
+        dates = pd.date_range(
+            start=pd.to_datetime(daily.Time(), unit="s") + offset,
+            periods=len(daily.Variables(0).ValuesAsNumpy()),
+            freq=pd.Timedelta(seconds=daily.Interval()),
+        )
+        return pd.DataFrame({
+            "date": dates.date,
+            "rain": daily.Variables(0).ValuesAsNumpy(),
+            "snowfall": daily.Variables(1).ValuesAsNumpy(),
+            "weather_code": daily.Variables(2).ValuesAsNumpy(),
+            "temperature": daily.Variables(3).ValuesAsNumpy(),
+        })
+
+    # =========================================================
+    # READ
+    # =========================================================
+    def get_range(self, start, end):
+        """Daily weather for [start, end], fetching only the missing days."""
+        db: Session = next(get_db())
+        today = datetime.now().date()
+
+        rows = self._stored_rows(db, start, end)
+        missing = self.missing_dates(start, end, today=today, rows=rows)
+        if missing:
+            # one call spanning every gap keeps it to a single round trip
+            fetched = self.fetch(min(missing), max(missing))
+            fetched = fetched[fetched["date"].isin(missing)]
+            self._save(db, fetched, datetime.now())
+            rows = self._stored_rows(db, start, end)
+        return self._frame(rows)
+
+    def stored_range(self, start, end):
+        """Stored rows only (never calls the API); missing days are absent."""
+        db: Session = next(get_db())
+        return self._frame(self._stored_rows(db, start, end))
+
+    @staticmethod
+    def _frame(rows):
+        df = pd.DataFrame(
+            [(r.date, r.rain, r.snowfall, r.weather_code, r.temperature) for r in rows],
+            columns=["date", "rain", "snowfall", "weather_code", "temperature"],
+        )
+        return df.sort_values("date").reset_index(drop=True)
@@ -1,6 +1,16 @@
 import os
+import threading
+import time
+
+from flask import g, has_app_context
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from sqlalchemy.pool import QueuePool
+
+from ..config.config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_ECHO
+)
 
 Base = declarative_base()
 
@@ -14,22 +24,145 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
 # 環境変数がない場合のフォールバック（開発用）
 
 
+# =========================================================
+# POOL METRICS
+# =========================================================
+class PoolMetrics:
+    """Counters for connection checkouts and the time spent waiting for one."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool):
+        with self._lock:
+            counters = {
+                "checkouts_total": self.checkouts,
+                "checkout_timeouts_total": self.timeouts,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            **counters,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return conn
+
+
 engine = create_engine(
     DATABASE_URL,
-    echo=True,       
+    echo=DB_ECHO,
     future=True,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
 )
 
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+
+# =========================================================
+# REQUEST-SCOPED SESSION
+# =========================================================
+def _session_scope():
+    # Flask の app context ごとに1セッション (それ以外はスレッドごと)
+    if has_app_context():
+        return id(g._get_current_object())
+    return threading.get_ident()
+
+
+db_session = scoped_session(SessionLocal, scopefunc=_session_scope)
+
+
 def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    """Yield the session of the current request (or thread).
+
+    The session is closed by ``remove_session`` at app context teardown,
+    so services can keep calling ``next(get_db())``.
+    """
+    yield db_session()
+
+
+def remove_session(exc=None):
+    """Close the current scope's session and return its connection to the pool."""
+    db_session.remove()
+
+
+def init_app(app):
+    app.teardown_appcontext(remove_session)
+
+
+def pool_status():
+    return pool_metrics.snapshot(engine.pool)
+
+def bulk_upsert(db, model, rows, index_elements, update_columns, increment_columns=()):
+    """INSERT ... ON CONFLICT DO UPDATE for many rows in one statement.
+
+    ``update_columns`` are overwritten with the new values and
+    ``increment_columns`` are added to the stored ones (counters).
+    PostgreSQL and SQLite share the same ON CONFLICT syntax; other dialects
+    fall back to per-row ``merge`` (only correct when the conflict target
+    is the primary key).
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            current = db.get(model, tuple(row[k] for k in index_elements))
+            if current is not None:
+                row = {**row, **{c: getattr(current, c) + row[c] for c in increment_columns}}
+            db.merge(model(**row))
+        return
+
+    stmt = insert(model).values(rows)
+    set_ = {col: stmt.excluded[col] for col in update_columns}
+    table = model.__table__
+    set_.update({col: table.c[col] + stmt.excluded[col] for col in increment_columns})
+    stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    db.execute(stmt)
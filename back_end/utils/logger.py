@@ -0,0 +1,20 @@
+import logging
+
+from ..config.config import LOG_LEVEL
+
+
+_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+def get_logger(name):
+    """Logger under the ``back_end`` root; configured once, level from LOG_LEVEL."""
+    root = logging.getLogger("back_end")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    if not name.startswith("back_end"):
+        name = f"back_end.{name}"
+    return logging.getLogger(name)
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from functools import wraps
+import bisect
+import threading
+import time
+
+from flask import g, has_app_context, request
+
+from ..config.config import LATENCY_BUCKETS, SLOW_REQUEST_SECONDS
+from .logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label value -> [bucket counts..., +Inf count], sum
+        self._counts = {}
+        self._sums = {}
+
+    def observe(self, value, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._counts.setdefault(value, [0] * (len(self.buckets) + 1))
+            counts[i] += 1
+            self._sums[value] = self._sums.get(value, 0.0) + seconds
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        for value, counts, total in items:
+            label = f'{self.label}="{value}"'
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {running}')
+            running += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {running}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {running}")
+        return lines
+
+
+stage_latency = Histogram(
+    "ccc_stage_duration_seconds", "Time spent in each pipeline stage.", "stage"
+)
+request_latency = Histogram(
+    "ccc_http_request_duration_seconds", "Time spent handling each endpoint.", "endpoint"
+)
+
+
+# =========================================================
+# SPANS
+# =========================================================
+@contextmanager
+def span(stage):
+    """Time a pipeline stage; also kept on the request for the slow-request log."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        stage_latency.observe(stage, seconds)
+        if has_app_context():
+            g.setdefault("spans", []).append((stage, seconds))
+
+
+def timed(stage):
+    """Decorator form of ``span``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# =========================================================
+# FLASK
+# =========================================================
+def _start_request():
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    request_latency.observe(request.endpoint or "unknown", seconds)
+
+    if seconds >= SLOW_REQUEST_SECONDS:
+        stages = ", ".join(f"{name}={s:.3f}s" for name, s in g.get("spans", []))
+        logger.warning(
+            "slow request %s %s took %.3fs (%s)",
+            request.method, request.path, seconds, stages or "no stages",
+        )
+    return response
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def render_metrics(extra_gauges=None):
+    """Prometheus text exposition of the histograms plus ``{name: value}`` gauges."""
+    lines = stage_latency.render() + request_latency.render()
+    for name, value in (extra_gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
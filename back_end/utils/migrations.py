@@ -0,0 +1,194 @@
+from datetime import date, datetime
+
+from sqlalchemy import inspect, text
+
+from ..config.config import DEFAULT_STORE_ID
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# `Base.metadata.create_all` only creates missing tables; it never alters an
+# existing one. Schema changes to tables that already hold data are listed
+# here as (name, function) pairs and applied once, in order, at startup.
+# Each step must also be a no-op on a database freshly built by create_all.
+
+
+def _columns(conn, table):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn, table, column, ddl_type):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+# =========================================================
+# STEPS
+# =========================================================
+def pred_sales_unique_date(conn):
+    _add_column(conn, "prediction_sales", "model_version", "VARCHAR(32)")
+    _add_column(conn, "prediction_sales", "updated_at", "TIMESTAMP")
+    # keep the newest row per date before enforcing uniqueness
+    conn.execute(text(
+        "DELETE FROM prediction_sales WHERE id NOT IN "
+        "(SELECT MAX(id) FROM prediction_sales GROUP BY date)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_pred_sales_date "
+        "ON prediction_sales (date)"
+    ))
+
+
+def pred_sales_store_id(conn):
+    _add_column(
+        conn, "prediction_sales", "store_id",
+        f"INTEGER NOT NULL DEFAULT {int(DEFAULT_STORE_ID)}",
+    )
+    conn.execute(text("DROP INDEX IF EXISTS uq_pred_sales_date"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_pred_sales_store_date "
+        "ON prediction_sales (store_id, date)"
+    ))
+
+
+def shift_blocks_from_hours(conn):
+    # 旧 shift_ass (1時間 = 1行) を連続勤務ブロックにまとめて移す
+    tables = inspect(conn).get_table_names()
+    if "shift_ass" not in tables:
+        return
+    if conn.execute(text("SELECT COUNT(*) FROM shift_blocks")).scalar():
+        return
+
+    staff_ids = {row[0] for row in conn.execute(text("SELECT id FROM staff"))}
+    rows = conn.execute(text(
+        "SELECT staff_id, date, hour, status FROM shift_ass "
+        "ORDER BY date, staff_id, hour"
+    )).all()
+
+    blocks = []
+    for staff_id, day, hour, status in rows:
+        if status == "help":
+            staff_id = None
+        elif staff_id not in staff_ids:
+            continue    # 削除済みスタッフ
+        last = blocks[-1] if blocks else None
+        if (last and last["staff_id"] == staff_id and last["date"] == day
+                and last["end_hour"] == hour):
+            last["end_hour"] = hour + 1
+        else:
+            blocks.append(
+                {"staff_id": staff_id, "date": day, "start_hour": hour, "end_hour": hour + 1}
+            )
+    if blocks:
+        conn.execute(text(
+            "INSERT INTO shift_blocks (staff_id, date, start_hour, end_hour) "
+            "VALUES (:staff_id, :date, :start_hour, :end_hour)"
+        ), blocks)
+
+
+# (name, table, columns) for the date-range reads; shared with
+# scripts/bench_range_queries.py
+RANGE_INDEXES = [
+    ("ix_shift_blocks_date_start", "shift_blocks", "date, start_hour"),
+    ("ix_shift_blocks_staff_date", "shift_blocks", "staff_id, date"),
+    ("ix_shift_pre_date", "shift_pre", "date"),
+    ("ix_daily_data_date", "daily_data", "date"),
+]
+
+
+def create_range_indexes(conn):
+    for name, table, columns in RANGE_INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def range_indexes(conn):
+    # daily_data.date は文字列で保存されていた
+    date_type = next(
+        c["type"] for c in inspect(conn).get_columns("daily_data") if c["name"] == "date"
+    )
+    if conn.dialect.name == "postgresql" and "DATE" not in str(date_type).upper():
+        conn.execute(text(
+            "ALTER TABLE daily_data ALTER COLUMN date TYPE DATE USING date::date"
+        ))
+    # SQLite は列の型を変えられないが "YYYY-MM-DD" の文字列はそのまま比較できる
+    create_range_indexes(conn)
+
+
+def seed_resource_versions(conn):
+    # bump は UPDATE だけで済むように行を先に作っておく
+    for name in ("shifts", "staff", "shift_pre", "daily_report"):
+        conn.execute(text(
+            "INSERT INTO resource_versions (name, version) "
+            "SELECT :name, 0 WHERE NOT EXISTS "
+            "(SELECT 1 FROM resource_versions WHERE name = :name)"
+        ), {"name": name})
+
+
+def daily_rollups_backfill(conn):
+    # 既存の日報から集計テーブルを作る (空のときだけ)
+    from ..services.daily_rollups import rollup_rows
+
+    if conn.execute(text("SELECT COUNT(*) FROM daily_report_rollups")).scalar():
+        return
+    reports = [
+        (date.fromisoformat(str(d)[:10]), is_event, customers, sales, staff)
+        for d, is_event, customers, sales, staff in conn.execute(text(
+            "SELECT date, is_event, customer_count, sales, staff_count FROM daily_data"
+        ))
+    ]
+    rows = rollup_rows(reports)
+    if rows:
+        conn.execute(text(
+            "INSERT INTO daily_report_rollups (grain, period_start, weekday, report_count, "
+            "event_days, sales_sum, customer_sum, staff_count_sum, updated_at) VALUES "
+            "(:grain, :period_start, :weekday, :report_count, :event_days, :sales_sum, "
+            ":customer_sum, :staff_count_sum, :updated_at)"
+        ), rows)
+
+
+def shift_blocks_closing_hour(conn):
+    # 24時枠 (24:00-25:00) は無くなったので閉店時刻で切る
+    from ..services.shift_tables import HOUR_END
+
+    conn.execute(
+        text("DELETE FROM shift_blocks WHERE start_hour >= :end"), {"end": HOUR_END}
+    )
+    conn.execute(
+        text("UPDATE shift_blocks SET end_hour = :end WHERE end_hour > :end"),
+        {"end": HOUR_END},
+    )
+
+
+MIGRATIONS = [
+    ("0001_pred_sales_unique_date", pred_sales_unique_date),
+    ("0002_pred_sales_store_id", pred_sales_store_id),
+    ("0003_shift_blocks_from_hours", shift_blocks_from_hours),
+    ("0004_range_indexes", range_indexes),
+    ("0005_seed_resource_versions", seed_resource_versions),
+    ("0006_daily_rollups_backfill", daily_rollups_backfill),
+    ("0007_shift_blocks_closing_hour", shift_blocks_closing_hour),
+]
+
+
+def run_migrations(engine):
+    """Apply every migration not yet recorded in ``schema_migrations``."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+        ))
+        applied = {
+            row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))
+        }
+
+    for name, step in MIGRATIONS:
+        if name in applied:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (name, applied_at) VALUES (:n, :t)"),
+                {"n": name, "t": datetime.now()},
+            )
+        logger.info("Migration applied: %s", name)
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import date
+
+from flask import jsonify, request, url_for
+from sqlalchemy import Date, tuple_
+
+from ..config.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .validators import parse_int
+
+
+# Keyset pagination: the cursor is the sort key of the last row returned,
+# so a page costs one index range scan however deep it is in the history.
+# Bodies stay plain JSON lists; the next page is announced in headers.
+# A request with neither limit nor cursor gets the whole list, so clients
+# that never read X-Next-Cursor keep seeing every row.
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(columns):
+            raise ValueError
+        return [
+            date.fromisoformat(v) if isinstance(col.type, Date) else v
+            for v, col in zip(values, columns)
+        ]
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+def page_args(args=None):
+    """(limit, cursor) from the query string; limit is None when unpaged. Raises ValueError."""
+    args = request.args if args is None else args
+    limit = parse_int(args.get("limit"), "limit", minimum=1, maximum=MAX_PAGE_SIZE)
+    cursor = args.get("cursor") or None
+    if limit is None and cursor is None:
+        return None, None
+    return limit or DEFAULT_PAGE_SIZE, cursor
+
+
+def paginate(query, columns, cursor=None, limit=None, descending=False):
+    """(rows, next_cursor) ordered by `columns`; next_cursor is None on the last page.
+
+    ``limit=None`` returns every row (no cursor).
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, columns)
+        key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    if limit is None:
+        return query.order_by(*order).all(), None
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def page_response(items, next_cursor):
+    """JSON list response with X-Next-Cursor / Link headers when more rows exist."""
+    headers = {}
+    if next_cursor is not None:
+        args = {**request.args.to_dict(), "cursor": next_cursor}
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return jsonify(items), 200, headers
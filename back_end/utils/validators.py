@@ -0,0 +1,28 @@
+from datetime import datetime
+
+
+def parse_date(value, field, required=False):
+    """"YYYY-MM-DD" -> date (None when missing and not required); raises ValueError."""
+    if value in (None, ""):
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{field} must be YYYY-MM-DD") from e
+
+
+def parse_int(value, field, minimum=None, maximum=None):
+    """Integer query argument (None when missing); raises ValueError."""
+    if value in (None, ""):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{field} must be an integer") from e
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{field} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{field} must be at most {maximum}")
+    return value
@@ -45,7 +45,8 @@ class _ShiftManagementScreenState extends State<ShiftManagementScreen> {
   final Map<String, Map<String, Map<String, String>>> _preferences = {};
   List<Map<String, dynamic>> _predictedShifts = [];
 
- final List<String> _timeOptions = List.generate(24, (hour) {
+ // "24:00" = 閉店まで (the shop closes at midnight)
+ final List<String> _timeOptions = List.generate(25, (hour) {
   return "${hour.toString().padLeft(2, '0')}:00";
 });
 
@@ -575,7 +576,7 @@ Future<void> _fetchAutoShift() async {
         .toList();
     final names = actualStaff.map((s) => s['name'].toString()).toSet().toList();
 
-    const hours = [9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24];
+    const hours = [9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23];
     const double hourWidth = 45.0;
     const double nameWidth = 100.0;
     const double totalHoursWidth = 70.0;
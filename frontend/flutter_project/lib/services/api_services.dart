@@ -221,7 +221,7 @@ class ApiService {
   /// GET: Fetches shift assignments specifically for "Today" and "Tomorrow" 
   /// to display on the main dashboard.
   static Future<List<Map<String, dynamic>>> fetchTodayShiftAssignment() async {
-    final url = '$baseUrl/shift_ass_dash_board';
+    final url = '$baseUrl/shift_ass_dash_board?format=hours';
     _trace('GET Dashboard Shifts: $url');
     try {
       final response = await http.get(Uri.parse(url), headers: _headers);
@@ -316,6 +316,7 @@ static Future<List<Map<String, dynamic>>> getAutoShiftTable(
   final query = {
     "start_date": DateFormat('yyyy-MM-dd').format(start),
     "end_date": DateFormat('yyyy-MM-dd').format(end),
+    "format": "hours",
   };
 
   final uri = Uri.parse('$baseUrl/shift_ass_data_main').replace(queryParameters: query);
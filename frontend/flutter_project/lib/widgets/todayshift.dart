@@ -72,7 +72,7 @@ class TodayShiftCard extends StatelessWidget {
         .toList();
 
     // Define business hours (e.g., 9:00 to 24:00)
-    final hours = List.generate(16, (i) => i + 9); // 9 to 24
+    final hours = List.generate(15, (i) => i + 9); // slots 9:00 .. 23:00-24:00
 
     return SingleChildScrollView(
       scrollDirection: Axis.vertical,
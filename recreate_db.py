@@ -1,12 +1,19 @@
 from back_end.utils.db import Base, engine
+from back_end.utils.migrations import run_migrations
 
 from back_end.models.staff_model import Staff
 from back_end.models.shift_pref_model import ShiftPre 
 
 from back_end.models.daily_report_model import Daily_data
 from back_end.models.pred_sales_model import Pred_sales
+from back_end.models.weather_model import WeatherDaily
 
 from back_end.models.shift_model import ShiftMain
+from back_end.models.shift_dirty_day_model import ShiftDirtyDay
+from back_end.models.shift_job_model import ShiftJob
+from back_end.models.resource_version_model import ResourceVersion
+from back_end.models.daily_rollup_model import DailyRollup
 #Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 print("DB recreated")
@@ -0,0 +1,150 @@
+"""Query plans and timings of the date-range reads, without and with the range indexes.
+
+    python -m scripts.bench_range_queries --years 3 --staff 30
+    python -m scripts.bench_range_queries --url postgresql://.../scratch
+
+Builds its own database (a temporary SQLite file unless --url is given),
+fills it with `--years` of history, then runs each query with the
+RANGE_INDEXES dropped and again after creating them. Never point --url at
+a database with real data: the tables are dropped first.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="scratch database URL (default: temporary SQLite file)")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--staff", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.url is None:
+    args.url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+# back_end.utils.db builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = args.url
+
+from sqlalchemy import text  # noqa: E402
+
+from back_end.utils.db import Base, engine  # noqa: E402
+from back_end.utils.migrations import RANGE_INDEXES, create_range_indexes  # noqa: E402
+from back_end.models.staff_model import Staff  # noqa: E402,F401
+from back_end.models.shift_pref_model import ShiftPre  # noqa: E402,F401
+from back_end.models.shift_model import ShiftMain  # noqa: E402,F401
+from back_end.models.pred_sales_model import Pred_sales  # noqa: E402,F401
+from back_end.models.daily_report_model import Daily_data  # noqa: E402,F401
+
+
+# the same filters the services run (one week, one staff member from today)
+QUERIES = {
+    "get_shift_main (shift_blocks by date)":
+        "SELECT id, date, staff_id, start_hour, end_hour FROM shift_blocks "
+        "WHERE date >= :start AND date <= :end",
+    "staff_dates (shift_blocks by staff)":
+        "SELECT date FROM shift_blocks WHERE staff_id = :staff_id AND date >= :start",
+    "combine_data (shift_pre by date)":
+        "SELECT * FROM shift_pre WHERE date >= :start AND date <= :end",
+    "get_one_week_pred (prediction_sales)":
+        "SELECT * FROM prediction_sales WHERE store_id = 1 AND date >= :start AND date <= :end",
+    "daily reports (daily_data by date)":
+        "SELECT * FROM daily_data WHERE date >= :start AND date <= :end",
+}
+
+
+def fill(conn, years, n_staff):
+    first = date.today() - timedelta(days=365 * years)
+    days = [first + timedelta(days=i) for i in range(365 * years + 14)]
+    rng = random.Random(0)
+
+    conn.execute(text(
+        "INSERT INTO staff (id, name, age, level, status, e_mail, gender) "
+        "VALUES (:id, :name, 20, :level, 'part_time', :mail, NULL)"
+    ), [
+        {"id": s, "name": f"staff{s}", "level": rng.randint(1, 5), "mail": f"s{s}@example.com"}
+        for s in range(1, n_staff + 1)
+    ])
+
+    pre, blocks, pred, daily = [], [], [], []
+    for d in days:
+        for s in rng.sample(range(1, n_staff + 1), k=n_staff * 2 // 3):
+            start = rng.randint(9, 15)
+            pre.append({"staff_id": s, "date": d, "st": f"{start:02d}:00:00",
+                        "et": f"{start + 6:02d}:00:00"})
+            blocks.append({"staff_id": s, "date": d, "sh": start, "eh": start + 3})
+            blocks.append({"staff_id": s, "date": d, "sh": start + 4, "eh": start + 6})
+        pred.append({"date": d, "sales": rng.uniform(200000, 400000)})
+        daily.append({"date": d, "day": d.strftime("%A"), "sales": rng.randint(200000, 400000)})
+
+    conn.execute(text(
+        "INSERT INTO shift_pre (staff_id, date, start_time, end_time) "
+        "VALUES (:staff_id, :date, :st, :et)"
+    ), pre)
+    conn.execute(text(
+        "INSERT INTO shift_blocks (staff_id, date, start_hour, end_hour) "
+        "VALUES (:staff_id, :date, :sh, :eh)"
+    ), blocks)
+    conn.execute(text(
+        "INSERT INTO prediction_sales (store_id, date, pred_sales) VALUES (1, :date, :sales)"
+    ), pred)
+    conn.execute(text(
+        "INSERT INTO daily_data (date, day, is_event, customer_count, sales, staff_names, staff_count) "
+        "VALUES (:date, :day, false, 100, :sales, '[]', 0)"
+    ), daily)
+    return len(blocks), len(pre)
+
+
+def explain(conn, sql, params):
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text("EXPLAIN ANALYZE " + sql), params).all()
+        return [r[0] for r in rows]
+    rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+    return [r[-1] for r in rows]
+
+
+def measure(conn, label, repeat):
+    today = date.today()
+    params = {"start": today, "end": today + timedelta(days=6), "staff_id": 1}
+    print(f"\n=== {label} ===")
+    for name, sql in QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(text(sql), params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name}: median {statistics.median(timings):.3f} ms")
+        for line in explain(conn, sql, params):
+            print(f"    {line}")
+
+
+def main():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        n_blocks, n_pre = fill(conn, args.years, args.staff)
+    print(f"{args.years} years, {args.staff} staff: {n_blocks} blocks, {n_pre} preferences")
+
+    with engine.begin() as conn:
+        for name, _, _ in RANGE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("ANALYZE"))
+    with engine.connect() as conn:
+        measure(conn, "without range indexes", args.repeat)
+
+    with engine.begin() as conn:
+        create_range_indexes(conn)
+        conn.execute(text("ANALYZE"))
+    with engine.connect() as conn:
+        measure(conn, "with range indexes", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Scaling benchmark for the scheduling pipeline on a local SQLite database.
+
+    python -m scripts.bench_shift_pipeline --staff 25,100,500 --days 7,31
+    python -m scripts.bench_shift_pipeline --staff 50 --days 14 --mode decomposed --out bench.jsonl
+    python -m scripts.bench_shift_pipeline --staff 500 --days 7 --no-symmetry
+
+For every (staff, days) pair the tables are rebuilt and filled with
+synthetic staff, preferences and stored sales predictions, then
+``combine_data``, model build, solve and the schedule save are timed
+separately. One JSON object per run is printed (and appended to --out),
+so results from two versions can be diffed or loaded into pandas.
+
+Predictions are read from the synthetic ``prediction_sales`` rows instead
+of running the sales model, so no weather API or model artifact is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, time as dtime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--staff", default="25,100,500", help="comma-separated staff counts")
+    parser.add_argument("--days", default="7,31", help="comma-separated horizon lengths")
+    parser.add_argument("--mode", default="full", choices=("full", "decomposed"))
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="solver max_time_in_seconds (default: size-based)")
+    parser.add_argument("--workers", type=int, default=None, help="solver num_search_workers")
+    parser.add_argument("--no-symmetry", action="store_true",
+                        help="build the model without symmetry breaking (for comparison)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=None, help="SQLite file (default: temporary)")
+    parser.add_argument("--out", default=None, help="append JSON lines to this file")
+    return parser.parse_args()
+
+
+args = parse_args()
+db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_shift.db")
+# back_end.utils.db builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = "sqlite:///" + db_path
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+if args.no_symmetry:
+    # read by config at import time, also in the decomposed solver's workers
+    os.environ["SOLVER_SYMMETRY_BREAKING"] = "0"
+
+import pandas as pd  # noqa: E402
+from ortools.sat.python import cp_model  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+import ortools  # noqa: E402
+
+from back_end.utils.db import Base, engine, SessionLocal, remove_session  # noqa: E402
+from back_end.utils.migrations import run_migrations  # noqa: E402
+from back_end.config.config import DEFAULT_STORE_ID  # noqa: E402
+# every model, so create_all builds all the tables the migrations touch
+from back_end.models.staff_model import Staff  # noqa: E402
+from back_end.models.shift_pref_model import ShiftPre  # noqa: E402
+from back_end.models.pred_sales_model import Pred_sales  # noqa: E402
+from back_end.models.daily_report_model import Daily_data  # noqa: E402,F401
+from back_end.models.daily_rollup_model import DailyRollup  # noqa: E402,F401
+from back_end.models.weather_model import WeatherDaily  # noqa: E402,F401
+from back_end.models.shift_model import ShiftMain  # noqa: E402,F401
+from back_end.models.shift_dirty_day_model import ShiftDirtyDay  # noqa: E402,F401
+from back_end.models.shift_job_model import ShiftJob  # noqa: E402,F401
+from back_end.models.resource_version_model import ResourceVersion  # noqa: E402,F401
+from back_end.services.pred_manager import GetPred  # noqa: E402
+from back_end.services.shift_ass_manager import ShiftAss  # noqa: E402
+from back_end.services.shift_problem import (  # noqa: E402
+    ShiftModel, SolverSettings, SHORTAGE_COST, NO_SENIOR_COST,
+)
+from back_end.services.shift_decompose import DecomposedSolver  # noqa: E402
+from back_end.services.staff_directory import staff_directory  # noqa: E402
+
+
+STATUSES = ["full_time", "part_time", "high-school", "international"]
+STATUS_NAMES = {
+    cp_model.OPTIMAL: "OPTIMAL", cp_model.FEASIBLE: "FEASIBLE",
+    cp_model.INFEASIBLE: "INFEASIBLE", cp_model.MODEL_INVALID: "MODEL_INVALID",
+    cp_model.UNKNOWN: "UNKNOWN",
+}
+
+
+class BenchShiftAss(ShiftAss):
+    """ShiftAss reading the synthetic stored predictions (no model / weather)."""
+
+    def get_pred_sale(self):
+        rows = GetPred.get_one_week_pred(self.start_date, self.end_date, DEFAULT_STORE_ID)
+        return pd.DataFrame({
+            "date": pd.to_datetime([r.date for r in rows]),
+            "predicted_sales": [int(r.pred_sales) for r in rows],
+        })
+
+
+# =========================================================
+# DATA
+# =========================================================
+def seed(n_staff, n_days, start, rng):
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    staff_directory.invalidate()
+
+    with SessionLocal() as db:
+        staff = [
+            Staff(
+                id=i + 1, name=f"staff{i + 1}", age=rng.randint(16, 55),
+                level=rng.randint(1, 5), status=rng.choice(STATUSES),
+                e_mail=f"staff{i + 1}@example.com", gender=None,
+            )
+            for i in range(n_staff)
+        ]
+        db.add_all(staff)
+
+        days = [start + timedelta(days=d) for d in range(n_days)]
+        prefs = []
+        for s in staff:
+            for day in days:
+                if rng.random() > 0.7:
+                    continue
+                begin = rng.randint(9, 15)
+                end = min(begin + rng.randint(5, 9), 23)
+                prefs.append(ShiftPre(
+                    staff_id=s.id, date=day, start_time=dtime(begin), end_time=dtime(end),
+                ))
+        db.add_all(prefs)
+
+        # 人数に比例した売上 (1人あたり 12000円前後)
+        db.add_all([
+            Pred_sales(
+                store_id=DEFAULT_STORE_ID, date=day,
+                pred_sales=float(n_staff * 12000 * rng.uniform(0.8, 1.2)),
+                updated_at=datetime.now(),
+            )
+            for day in days
+        ])
+        db.commit()
+        return len(prefs)
+
+
+# =========================================================
+# STAGES
+# =========================================================
+def measure(stage, results, func, *a, **kw):
+    """Run func, storing wall time and Python peak allocation under `stage`."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        return func(*a, **kw)
+    finally:
+        results[f"{stage}_seconds"] = round(time.perf_counter() - started, 4)
+        results[f"{stage}_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+
+
+def objective_of(problem, grid):
+    missing, no_senior = problem.shortage(grid)
+    return int(grid.sum() + SHORTAGE_COST * missing.sum() + NO_SENIOR_COST * no_senior.sum())
+
+
+def run_one(n_staff, n_days, start, rng):
+    n_prefs = seed(n_staff, n_days, start, rng)
+    end = start + timedelta(days=n_days - 1)
+    s = BenchShiftAss(start.isoformat(), end.isoformat())
+    s.started_at = datetime.now()
+
+    overrides = {}
+    if args.time_limit is not None:
+        overrides["max_time_in_seconds"] = args.time_limit
+    if args.workers is not None:
+        overrides["num_search_workers"] = args.workers
+
+    r = {"staff": n_staff, "days": n_days, "preferences": n_prefs, "mode": args.mode,
+         "symmetry": not args.no_symmetry}
+    df = measure("combine_data", r, s.combine_data)
+    r["rows"] = len(df)
+
+    problem = s.problem(df)
+    settings = SolverSettings.for_problem(problem, overrides)
+    r["variables"] = problem.n_vars
+    r["time_limit"] = settings.max_time_in_seconds
+
+    if args.mode == "full":
+        model = measure("model_build", r, ShiftModel, problem)
+        r["symmetry_classes"] = len(model.classes)
+        solver, status = measure("solve", r, model.solve, settings)
+        grid = model.solution(solver) if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+    else:
+        # 日ごとのモデル作成はワーカー内なので solve に含まれる
+        r["model_build_seconds"] = None
+        status, grid = measure("solve", r, DecomposedSolver(problem, settings).solve)
+
+    r["status"] = STATUS_NAMES.get(status, str(status))
+    r["objective"] = None if grid is None else objective_of(problem, grid)
+    if grid is not None:
+        missing, no_senior = problem.shortage(grid)
+        r["short_hours"] = int(missing.sum())
+        r["no_senior_slots"] = int(no_senior.sum())
+        rows = s.shift_rows(problem, grid)
+        measure("shift_save_db", r, s.save_schedule, rows)
+        r["saved_hours"] = len(rows)
+
+    remove_session()
+    return r
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    start = date.today() + timedelta(days=(7 - date.today().weekday()) % 7 or 7)
+    meta = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "ortools": getattr(ortools, "__version__", None),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    out = open(args.out, "a", encoding="utf-8") if args.out else None
+    try:
+        for n_staff in (int(v) for v in args.staff.split(",")):
+            for n_days in (int(v) for v in args.days.split(",")):
+                rng = random.Random(args.seed)
+                result = {**meta, **run_one(n_staff, n_days, start, rng)}
+                # プロセス全体の最大常駐メモリ (CP-SAT のネイティブ分も含む)
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                result["max_rss_mb"] = round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+                line = json.dumps(result)
+                print(line, flush=True)
+                if out:
+                    out.write(line + "\n")
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+# back_end.utils.db builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PRELOAD_SALES_MODEL", "0")
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from back_end.app import app  # noqa: E402
+from back_end.utils.db import Base, engine, SessionLocal, remove_session  # noqa: E402
+from back_end.utils.migrations import run_migrations  # noqa: E402
+from back_end.models.staff_model import Staff  # noqa: E402,F401
+from back_end.models.shift_pref_model import ShiftPre  # noqa: E402,F401
+from back_end.models.daily_report_model import Daily_data  # noqa: E402,F401
+from back_end.models.daily_rollup_model import DailyRollup  # noqa: E402,F401
+from back_end.models.pred_sales_model import Pred_sales  # noqa: E402,F401
+from back_end.models.weather_model import WeatherDaily  # noqa: E402,F401
+from back_end.models.shift_model import ShiftMain  # noqa: E402,F401
+from back_end.models.shift_dirty_day_model import ShiftDirtyDay  # noqa: E402,F401
+from back_end.models.shift_job_model import ShiftJob  # noqa: E402,F401
+from back_end.models.resource_version_model import ResourceVersion  # noqa: E402,F401
+from back_end.services.shift_ass_manager import ShiftAss  # noqa: E402
+from back_end.services.staff_directory import staff_directory  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Empty tables (migrations applied) for each test."""
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    staff_directory.invalidate()
+    with SessionLocal() as session:
+        yield session
+    remove_session()
+
+
+@pytest.fixture
+def client(db):
+    return app.test_client()
+
+
+@pytest.fixture
+def flat_sales(monkeypatch):
+    """Predicted sales low enough that every slot needs exactly one person."""
+    def get_pred_sale(self):
+        days = pd.date_range(self.start_date, self.end_date)
+        return pd.DataFrame({"date": days, "predicted_sales": [1000] * len(days)})
+    monkeypatch.setattr(ShiftAss, "get_pred_sale", get_pred_sale)
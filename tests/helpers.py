@@ -0,0 +1,19 @@
+from datetime import date, time
+
+from back_end.models.staff_model import Staff
+from back_end.models.shift_pref_model import ShiftPre, CLOSING_TIME
+
+
+def add_staff(db, n, level=3, status="part_time", days=(), start=time(9), end=CLOSING_TIME):
+    """`n` staff, each with the same preference on every day in `days`."""
+    for i in range(1, n + 1):
+        db.add(Staff(id=i, name=f"staff{i}", age=20, level=level, status=status,
+                     e_mail=f"staff{i}@example.com"))
+    db.flush()
+    for i in range(1, n + 1):
+        for day in days:
+            db.add(ShiftPre(staff_id=i, date=day, start_time=start, end_time=end))
+    db.commit()
+
+
+MONDAY = date(2026, 11, 2)
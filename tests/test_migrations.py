@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from back_end.models.shift_model import ShiftMain
+from back_end.utils.db import engine
+from back_end.utils.migrations import shift_blocks_closing_hour
+
+from .helpers import add_staff, MONDAY
+
+
+def test_closing_hour_clamps_legacy_blocks(db):
+    add_staff(db, 1)
+    db.add_all([
+        ShiftMain(staff_id=1, date=MONDAY, start_hour=20, end_hour=25),
+        ShiftMain(staff_id=None, date=MONDAY, start_hour=24, end_hour=25),
+        ShiftMain(staff_id=1, date=MONDAY + timedelta(days=1), start_hour=9, end_hour=14),
+    ])
+    db.commit()
+    with engine.begin() as conn:
+        shift_blocks_closing_hour(conn)
+        rows = conn.execute(text(
+            "SELECT date, start_hour, end_hour FROM shift_blocks ORDER BY date"
+        )).all()
+    assert [(r[1], r[2]) for r in rows] == [(20, 24), (9, 14)]
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from .helpers import add_staff, MONDAY
+
+
+def test_staff_list_is_complete_without_limit_or_cursor(client, db, monkeypatch):
+    monkeypatch.setattr("back_end.utils.pagination.DEFAULT_PAGE_SIZE", 2)
+    add_staff(db, 5)
+    res = client.get("/staff")
+    assert res.status_code == 200
+    assert [s["id"] for s in res.get_json()] == [1, 2, 3, 4, 5]
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_staff_pages_follow_the_cursor(client, db):
+    add_staff(db, 5)
+    ids, url = [], "/staff?limit=2"
+    while url:
+        res = client.get(url)
+        ids += [s["id"] for s in res.get_json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        url = f"/staff?limit=2&cursor={cursor}" if cursor else None
+    assert ids == [1, 2, 3, 4, 5]
+
+
+def test_shift_pre_list_is_complete_without_limit_or_cursor(client, db, monkeypatch):
+    monkeypatch.setattr("back_end.utils.pagination.DEFAULT_PAGE_SIZE", 2)
+    add_staff(db, 3, days=[MONDAY, MONDAY + timedelta(days=1)])
+    res = client.get("/shift_pre")
+    assert res.status_code == 200
+    assert len(res.get_json()) == 6
+    assert "X-Next-Cursor" not in res.headers
@@ -0,0 +1,73 @@
+from datetime import time, timedelta
+
+import pytest
+
+from back_end.models.shift_model import ShiftMain
+from back_end.services.shift_ass_manager import ShiftAss
+
+from .helpers import add_staff, MONDAY
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_first_solve_on_empty_schedule(client, db, flat_sales, incremental):
+    # shift_blocks は空: 前週のヒントも保存済みシフトも無い
+    add_staff(db, 4, days=[MONDAY])
+    day = MONDAY.isoformat()
+    res = client.post("/shift_ass", json={
+        "start_date": day, "end_date": day, "incremental": incremental,
+        "solver": {"max_time_in_seconds": 10},
+    })
+    assert res.status_code == 200
+    assert isinstance(res.get_json(), list) and res.get_json()
+    assert db.query(ShiftMain).count() > 0
+
+
+def test_fully_available_staff_leave_no_shortage(db, flat_sales):
+    # 開店から閉店まで全員が入れるなら、どの時間帯も不足しない
+    add_staff(db, 6, days=[MONDAY])
+    day = MONDAY.isoformat()
+    s = ShiftAss(day, day)
+    status, problem, grid = s.solve(s.combine_data(), {"max_time_in_seconds": 10})
+    assert grid is not None
+    # 閉店前の 23:00-24:00 も需要があり、希望で埋められる
+    assert problem.demand[:, -1].min() > 0
+    assert problem.available[..., -1].all()
+    missing, no_senior = problem.shortage(grid)
+    assert missing.sum() == 0
+    assert not no_senior.any()
+
+
+def test_legacy_closing_block_is_ignored(client, db, flat_sales):
+    # 24時枠を含む旧ブロック (前週の同じ曜日) はヒントから外す
+    add_staff(db, 4, days=[MONDAY])
+    db.add(ShiftMain(staff_id=1, date=MONDAY - timedelta(weeks=1), start_hour=20, end_hour=25))
+    db.commit()
+    day = MONDAY.isoformat()
+    res = client.post("/shift_ass", json={
+        "start_date": day, "end_date": day, "solver": {"max_time_in_seconds": 10},
+    })
+    assert res.status_code == 200
+
+
+def test_weekly_cap_counts_calendar_weeks(db, flat_sales):
+    # 希望が月曜だけ: 7日分の問題だが暦では7週なので週28時間の上限は効かない
+    mondays = [MONDAY + timedelta(weeks=w) for w in range(7)]
+    add_staff(db, 1, status="international", days=mondays, end=time(14))
+    s = ShiftAss(mondays[0].isoformat(), mondays[-1].isoformat())
+    status, problem, grid = s.solve(s.combine_data(), {"max_time_in_seconds": 10, "mode": "full"})
+    assert problem.week_of_day().tolist() == list(range(7))
+    assert grid[0].sum(axis=1).tolist() == [5] * 7
+
+
+@pytest.mark.parametrize("mode", ["full", "decomposed"])
+def test_weekly_cap_with_gaps(db, flat_sales, mode):
+    # 1・3週目は月〜木だけ (20時間)、5週目は毎日 (5時間 x 7日 > 28時間)
+    days = [MONDAY + timedelta(weeks=w, days=i) for w in (0, 2) for i in range(4)]
+    days += [MONDAY + timedelta(weeks=4, days=i) for i in range(7)]
+    add_staff(db, 1, status="international", days=days, end=time(14))
+    s = ShiftAss(days[0].isoformat(), days[-1].isoformat())
+    status, problem, grid = s.solve(s.combine_data(), {"max_time_in_seconds": 10, "mode": mode})
+    assert grid is not None
+    per_day = grid[0].sum(axis=1)
+    assert per_day[:8].tolist() == [5] * 8
+    assert per_day[8:].sum() == 28
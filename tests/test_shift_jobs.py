@@ -0,0 +1,24 @@
+import numpy as np
+
+from back_end.config.config import SHIFT_JOB_DECOMPOSE_WORKERS
+from back_end.services.shift_decompose import DecomposedSolver
+from back_end.services.shift_jobs import _init_worker
+from back_end.services.shift_problem import ShiftProblem, SolverSettings
+from back_end.services.shift_tables import HOURS
+
+
+def _problem(n_days):
+    dates = np.datetime64("2026-11-02") + np.arange(n_days)
+    return ShiftProblem(
+        np.array([1]), np.array([3]), np.array([0], dtype=np.int8), dates,
+        np.ones((n_days, len(HOURS)), dtype=np.int64),
+        np.ones((1, n_days, len(HOURS)), dtype=bool),
+    )
+
+
+def test_job_worker_caps_decompose_processes(monkeypatch):
+    monkeypatch.setattr(DecomposedSolver, "worker_limit", 64)
+    _init_worker()
+    # 1ヶ月分でもジョブ1つあたりの上限を超えない
+    solver = DecomposedSolver(_problem(31), SolverSettings(10), max_workers=64)
+    assert solver.max_workers == SHIFT_JOB_DECOMPOSE_WORKERS
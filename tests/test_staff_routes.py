@@ -0,0 +1,10 @@
+from .helpers import add_staff
+
+
+def test_staff_reads_do_not_expose_pay(client, db):
+    add_staff(db, 2)
+    listed = client.get("/staff").get_json()
+    single = client.get("/staff/1").get_json()
+    assert all("wage" not in s for s in listed)
+    assert "wage" not in single
+    assert set(single) == {"id", "name", "age", "level", "status", "e_mail", "gender"}